@@ -0,0 +1,99 @@
+from collections import deque
+
+# Emergency intervals remembered for chart highlighting
+INTERVAL_CAPACITY = 256
+
+
+class RollingStats:
+    """Max, min and mean over the last window values, O(1) amortized per push
+
+    Max and min come from monotonic deques of (index, value); the mean
+    from a running sum over a bounded deque of the window's values.
+    """
+
+    def __init__(self, window):
+        self.window = window
+        self._values = deque(maxlen=window)
+        self._max = deque()
+        self._min = deque()
+        self._sum = 0.0
+        self._count = 0
+
+    def push(self, value):
+        if len(self._values) == self.window:
+            self._sum -= self._values[0]
+        self._values.append(value)
+        self._sum += value
+        index = self._count
+        self._count += 1
+        oldest = index - self.window
+        while self._max and self._max[-1][1] <= value:
+            self._max.pop()
+        self._max.append((index, value))
+        if self._max[0][0] <= oldest:
+            self._max.popleft()
+        while self._min and self._min[-1][1] >= value:
+            self._min.pop()
+        self._min.append((index, value))
+        if self._min[0][0] <= oldest:
+            self._min.popleft()
+
+    @property
+    def max(self):
+        return self._max[0][1] if self._max else None
+
+    @property
+    def min(self):
+        return self._min[0][1] if self._min else None
+
+    @property
+    def mean(self):
+        return self._sum / len(self._values) if self._values else None
+
+
+class EmergencyIntervals:
+    """Start/end times of emergencies, opened and closed as ticks arrive"""
+
+    def __init__(self, capacity=INTERVAL_CAPACITY):
+        self._closed = deque(maxlen=capacity)
+        self._open = None    # (emergency_id, start)
+
+    def update(self, time, emergency_id):
+        """Track the emergency active at time; -1 means none"""
+        current = self._open[0] if self._open is not None else -1
+        if emergency_id == current:
+            return
+        if self._open is not None:
+            self._closed.append((self._open[0], self._open[1], time))
+        self._open = (emergency_id, time) if emergency_id >= 0 else None
+
+    def since(self, time, now):
+        """(emergency_id, start, end) intervals overlapping [time, now]; an open one ends at now"""
+        intervals = [interval for interval in self._closed if interval[2] >= time]
+        if self._open is not None:
+            intervals.append((self._open[0], self._open[1], now))
+        return intervals
+
+
+class TrafficAnalytics:
+    """Chart aggregates maintained per tick instead of recomputed per rerun"""
+
+    def __init__(self, window):
+        self.vehicles = RollingStats(window)
+        self.green_lights = RollingStats(window)
+        self.congestion = RollingStats(window)
+        self.intervals = EmergencyIntervals()
+
+    def update(self, time, total_vehicles, green_lights, avg_congestion, emergency_id):
+        self.vehicles.push(total_vehicles)
+        self.green_lights.push(green_lights)
+        self.congestion.push(avg_congestion)
+        self.intervals.update(time, emergency_id)
+
+    def summary(self, since, now):
+        return {
+            "vehicles_max": self.vehicles.max, "vehicles_min": self.vehicles.min,
+            "vehicles_mean": self.vehicles.mean,
+            "green_mean": self.green_lights.mean, "congestion_mean": self.congestion.mean,
+            "intervals": self.intervals.since(since, now),
+        }
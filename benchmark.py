@@ -0,0 +1,189 @@
+import argparse
+import json
+import os
+import platform
+import resource
+import subprocess
+import time
+import tracemalloc
+
+import numpy as np
+import plotly.graph_objects as go
+
+from analytics import TrafficAnalytics
+from generator import synthetic_simulation
+from history import IntersectionHistory, TrafficHistory, history_nodes
+from live_updates import diff_snapshots, to_json
+from network_map import NetworkMap, diff_to_json
+
+STAGES = ("simulation", "aggregation", "figure", "serialization", "map_json", "analytics_json")
+DEFAULT_SIZES = (10, 1000, 100_000)
+
+
+def _percentiles(samples):
+    ms = np.asarray(samples) * 1000
+    return {"p50_ms": round(float(np.percentile(ms, 50)), 4),
+            "p99_ms": round(float(np.percentile(ms, 99)), 4),
+            "mean_ms": round(float(ms.mean()), 4)}
+
+
+class _Pipeline:
+    """One dashboard tick split into the stages being measured"""
+
+    def __init__(self, n, routes, seed, ticks):
+        self.simulation = synthetic_simulation(n, seed, routes, emergency_seconds=float("inf"))
+        for key in self.simulation.routes:
+            self.simulation.activate(key)
+        self.history = TrafficHistory(ticks)
+        self.intersection_history = IntersectionHistory(n, nodes=history_nodes(n, self.simulation.hospital_nodes))
+        self.analytics = TrafficAnalytics(50)
+        self.network_map = NetworkMap(self.simulation.store)
+        self.snapshot = self.simulation.snapshot(0)
+        self.version = 0
+
+    def simulation_stage(self, tick_seconds):
+        self.simulation.step(tick_seconds)
+        self.version += 1
+        self.previous, self.snapshot = self.snapshot, self.simulation.snapshot(self.version)
+
+    def aggregation_stage(self):
+        snapshot = self.snapshot
+        total_vehicles, green_lights, avg_congestion = snapshot.store.metrics()
+        emergency = snapshot.current()
+        emergency_id = emergency["id"] if emergency is not None else -1
+        now = snapshot.clock
+        self.history.append(now, total_vehicles, green_lights, avg_congestion,
+                            snapshot.emergency_active, emergency_id)
+        self.analytics.update(now, total_vehicles, green_lights, avg_congestion, emergency_id)
+        self.intersection_history.record(now, snapshot.store.vehicles, snapshot.store.status)
+
+    def figure_stage(self):
+        emergency = self.snapshot.current()
+        progress = self.snapshot.progress(emergency["id"]) if emergency is not None else 0
+        self.map_diff = self.network_map.update(self.snapshot.store, emergency, progress)
+        history = self.history.window(50)
+        self.analytics_figure = go.Figure()
+        for field in ("total_vehicles", "green_lights", "avg_congestion"):
+            self.analytics_figure.add_trace(go.Scatter(x=history["time"], y=history[field], mode="lines+markers"))
+
+    def serialization_stage(self):
+        change = diff_snapshots(self.previous, self.snapshot)
+        to_json(change, self.snapshot.store.names)
+        diff_to_json(self.map_diff)
+
+    def map_json_stage(self):
+        # What st.plotly_chart sends for the network map on each rerun
+        self.network_map.figure.to_json()
+
+    def analytics_json_stage(self):
+        self.analytics_figure.to_json()
+
+    def stages(self, tick_seconds):
+        """Stage callables in execution order"""
+        return {
+            "simulation": lambda: self.simulation_stage(tick_seconds),
+            "aggregation": self.aggregation_stage,
+            "figure": self.figure_stage,
+            "serialization": self.serialization_stage,
+            "map_json": self.map_json_stage,
+            "analytics_json": self.analytics_json_stage,
+        }
+
+
+def run_case(n, routes=4, ticks=200, tick_seconds=1.0, seed=0, memory_ticks=5):
+    """Per-stage latency percentiles and peak traced memory for one network size"""
+    setup_start = time.perf_counter()
+    pipeline = _Pipeline(n, routes, seed, ticks)
+    setup_seconds = time.perf_counter() - setup_start
+    steps = pipeline.stages(tick_seconds)
+
+    samples = {stage: [] for stage in STAGES}
+    for _ in range(ticks):
+        for stage in STAGES:
+            start = time.perf_counter()
+            steps[stage]()
+            samples[stage].append(time.perf_counter() - start)
+
+    # Memory is traced in a separate short pass so tracing does not skew timings
+    peaks = {stage: 0 for stage in STAGES}
+    tracemalloc.start()
+    for _ in range(memory_ticks):
+        for stage in STAGES:
+            tracemalloc.reset_peak()
+            base = tracemalloc.get_traced_memory()[0]
+            steps[stage]()
+            peaks[stage] = max(peaks[stage], tracemalloc.get_traced_memory()[1] - base)
+    tracemalloc.stop()
+
+    return {
+        "nodes": n, "routes": len(pipeline.simulation.routes), "ticks": ticks, "edges": pipeline.simulation.graph.num_edges,
+        "setup_s": round(setup_seconds, 3),
+        "stages": {stage: {**_percentiles(samples[stage]), "peak_kib": round(peaks[stage] / 1024, 1)}
+                   for stage in STAGES},
+    }
+
+
+def _git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True, cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_suite(sizes=DEFAULT_SIZES, routes=4, ticks=200, tick_seconds=1.0, seed=0):
+    results = [run_case(n, routes, ticks, tick_seconds, seed) for n in sizes]
+    return {
+        "revision": _git_revision(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        # ru_maxrss is KiB on Linux
+        "max_rss_mib": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "results": results,
+    }
+
+
+def print_report(report, baseline=None):
+    previous = {}
+    if baseline is not None:
+        previous = {(r["nodes"], r["routes"]): r for r in baseline["results"]}
+    print(f"revision {report['revision']}  max RSS {report['max_rss_mib']} MiB")
+    for result in report["results"]:
+        print(f"\n{result['nodes']} nodes, {result['routes']} routes, {result['edges']} edges "
+              f"(setup {result['setup_s']} s)")
+        before = previous.get((result["nodes"], result["routes"]))
+        for stage, stats in result["stages"].items():
+            line = (f"  {stage:<14} p50 {stats['p50_ms']:>9.3f} ms  p99 {stats['p99_ms']:>9.3f} ms"
+                    f"  peak {stats['peak_kib']:>10.1f} KiB")
+            if before is not None and stage in before["stages"]:
+                old = before["stages"][stage]["p50_ms"]
+                if old > 0:
+                    line += f"  ({stats['p50_ms'] / old:.2f}x p50 vs baseline)"
+            print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the simulation and rendering hot paths")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES))
+    parser.add_argument("--routes", type=int, default=4, help="concurrent emergency routes")
+    parser.add_argument("--ticks", type=int, default=200)
+    parser.add_argument("--tick", type=float, default=1.0, help="simulated seconds per tick")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="benchmark.json")
+    parser.add_argument("--baseline", help="earlier JSON report to compare against")
+    args = parser.parse_args()
+
+    report = run_suite(args.sizes, args.routes, args.ticks, args.tick, args.seed)
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    print_report(report, baseline)
+    print(f"\nwrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
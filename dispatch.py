@@ -0,0 +1,362 @@
+import numpy as np
+
+try:
+    from scipy.optimize import linear_sum_assignment
+except ImportError:  # greedy assignment with swap repair
+    linear_sum_assignment = None
+
+from emergencies import ROUTE_PRIORITIES
+
+# Simulated seconds between re-pricing cached travel times under new load
+REFRESH_SECONDS = 60.0
+# Seconds a new plan must save before a unit already en route is diverted
+SWITCH_PENALTY = 120.0
+# Stands in for unreachable pairs inside the solver
+UNREACHABLE = 1e9
+# Cost of leaving an incident unserved, per priority rank, on top of the time it has waited
+UNSERVED_SECONDS = 4 * 3600.0
+# Improving swaps the greedy fallback tries before giving up
+REPAIR_ROUNDS = 50
+# Incidents re-priced per assign() after a weight refresh, bounding each tick's searches
+REPRICE_PER_TICK = 8
+
+_PRIORITY_NAMES = {rank: name for name, rank in ROUTE_PRIORITIES.items()}
+
+# Unit states
+IDLE, EN_ROUTE, TRANSPORT = 0, 1, 2
+UNIT_STATES = ("idle", "en route", "transport")
+
+
+def _greedy(cost):
+    """Each free column claims its cheapest free row; clashes go to the cheapest claim"""
+    rows_free = np.ones(cost.shape[0], dtype=bool)
+    cols_free = np.ones(cost.shape[1], dtype=bool)
+    rows, cols = [], []
+    while rows_free.any() and cols_free.any():
+        free_cols = np.flatnonzero(cols_free)
+        masked = np.where(rows_free[:, None], cost[:, free_cols], np.inf)
+        best_row = masked.argmin(axis=0)
+        best_cost = masked[best_row, np.arange(len(free_cols))]
+        # One winner per row: the claim with the lowest cost
+        order = np.lexsort((best_cost, best_row))
+        first = np.ones(len(order), dtype=bool)
+        first[1:] = best_row[order][1:] != best_row[order][:-1]
+        winners = order[first]
+        rows.append(best_row[winners])
+        cols.append(free_cols[winners])
+        rows_free[best_row[winners]] = False
+        cols_free[free_cols[winners]] = False
+    if not rows:
+        return np.empty(0, dtype=np.intp), np.empty(0, dtype=np.intp)
+    return np.concatenate(rows), np.concatenate(cols)
+
+
+def _repair(cost, rows, cols, rounds=REPAIR_ROUNDS):
+    """Apply the best improving move each round
+
+    Moves are swapping two pairs' columns, handing a pair's column to an
+    unmatched row, or moving a pair's row onto an unmatched column.
+    """
+    rows, cols = rows.copy(), cols.copy()
+    free_rows = np.setdiff1d(np.arange(cost.shape[0]), rows)
+    free_cols = np.setdiff1d(np.arange(cost.shape[1]), cols)
+    pairs = np.arange(len(rows))
+    for _ in range(rounds):
+        current = cost[rows, cols]
+        swapped = cost[rows[:, None], cols[None, :]]
+        gain = current[:, None] + current[None, :] - swapped - swapped.T
+        a, b = np.unravel_index(gain.argmax(), gain.shape)
+        moves = [(gain[a, b], "swap", a)]
+        if len(free_rows):
+            by_row = cost[free_rows[:, None], cols[None, :]]
+            row_pick = by_row.argmin(axis=0)
+            row_gain = current - by_row[row_pick, pairs]
+            k = row_gain.argmax()
+            moves.append((row_gain[k], "row", k))
+        if len(free_cols):
+            by_col = cost[rows[:, None], free_cols[None, :]]
+            col_pick = by_col.argmin(axis=1)
+            col_gain = current - by_col[pairs, col_pick]
+            k = col_gain.argmax()
+            moves.append((col_gain[k], "col", k))
+        best, move, k = max(moves, key=lambda m: m[0])
+        if best <= 1e-9:
+            break
+        if move == "swap":
+            cols[a], cols[b] = cols[b], cols[a]
+        elif move == "row":
+            free_rows[row_pick[k]], rows[k] = rows[k], free_rows[row_pick[k]]
+        else:
+            free_cols[col_pick[k]], cols[k] = cols[k], free_cols[col_pick[k]]
+    return rows, cols
+
+
+def solve_assignment(cost):
+    """Minimum-cost matching of rows to columns as (rows, cols)
+
+    Uses SciPy's Hungarian solver when installed, else a vectorized
+    greedy pass followed by swap repair.
+    """
+    cost = np.asarray(cost, dtype=np.float64)
+    if cost.size == 0:
+        return np.empty(0, dtype=np.intp), np.empty(0, dtype=np.intp)
+    if linear_sum_assignment is not None:
+        return linear_sum_assignment(cost)
+    rows, cols = _greedy(cost)
+    return _repair(cost, rows, cols)
+
+
+class Assignment:
+    """One dispatch plan: unit rows matched to incidents and their hospitals"""
+
+    def __init__(self, units, incidents, hospitals, response, transport):
+        self.units = units            # rows of the unit_nodes passed to assign()
+        self.incidents = incidents    # incident ids
+        self.hospitals = hospitals    # hospital rows
+        self.response = response      # seconds from unit to incident
+        self.transport = transport    # seconds from incident to hospital
+
+    def __len__(self):
+        return len(self.units)
+
+
+class Dispatcher:
+    """Assigns units to open incidents and incidents to hospitals
+
+    Reported incidents each get one reverse shortest-path search, cached
+    as the seconds from every node to the incident, plus their seconds
+    to every hospital. A tick then only gathers rows at the units'
+    nodes into the units x incidents x hospitals cost tensor, weights
+    response time by priority and solves the assignment, so hundreds of
+    units re-plan every tick without a graph search. After a weight
+    refresh cached times are re-priced a few incidents per tick, batched
+    with any new ones into one multi-source search.
+
+    Plans are priced in seconds of response plus transport. Every
+    incident may also be left unserved at its priority times
+    UNSERVED_SECONDS plus the time it has waited, so when units run short
+    the most urgent and longest-waiting incidents are served first.
+    """
+
+    def __init__(self, graph, hospital_nodes, switch_penalty=SWITCH_PENALTY, reprice_per_tick=REPRICE_PER_TICK,
+                 unserved_seconds=UNSERVED_SECONDS):
+        self.graph = graph
+        self.hospital_nodes = np.asarray(hospital_nodes, dtype=np.intp)
+        self.switch_penalty = switch_penalty
+        self.unserved_seconds = unserved_seconds
+        self.reprice_per_tick = reprice_per_tick
+        self.weight = None
+        self.ids = np.empty(0, dtype=np.int64)
+        self.nodes = np.empty(0, dtype=np.intp)
+        self.priority = np.empty(0, dtype=np.float64)
+        self.reported = np.empty(0, dtype=np.float64)
+        self._to_incident = np.empty((0, len(graph)), dtype=np.float32)
+        self._to_hospital = np.empty((0, len(self.hospital_nodes)), dtype=np.float32)
+        # Incidents priced so far (a prefix of ids), and which of those predate the weights
+        self._priced = 0
+        self._stale = np.empty(0, dtype=bool)
+        self._next_id = 0
+
+    def __len__(self):
+        return len(self.ids)
+
+    def report(self, node, priority="High", time=0.0):
+        """Queue an incident at a node; it is priced at the next assign()"""
+        incident_id = self._next_id
+        self._next_id += 1
+        self.ids = np.append(self.ids, incident_id)
+        self.nodes = np.append(self.nodes, node)
+        self.priority = np.append(self.priority, ROUTE_PRIORITIES.get(priority, 1))
+        self.reported = np.append(self.reported, time)
+        return incident_id
+
+    def resolve(self, incident_ids):
+        """Drop incidents that have been reached"""
+        keep = ~np.isin(self.ids, incident_ids)
+        priced = keep[:self._priced]
+        self._to_incident = self._to_incident[priced]
+        self._to_hospital = self._to_hospital[priced]
+        self._stale = self._stale[priced]
+        self._priced = int(priced.sum())
+        self.ids, self.nodes = self.ids[keep], self.nodes[keep]
+        self.priority, self.reported = self.priority[keep], self.reported[keep]
+
+    def update_weights(self, weight):
+        """New edge costs; open incidents are re-priced over the next few assign() calls"""
+        self.weight = np.asarray(weight, dtype=np.float64)
+        self._stale[:] = True
+
+    def _price(self):
+        """One batched search for new incidents and the next few stale ones"""
+        stale = np.flatnonzero(self._stale)[:self.reprice_per_tick]
+        rows = np.concatenate([stale, np.arange(self._priced, len(self.ids))])
+        if len(rows) == 0:
+            return
+        nodes = self.nodes[rows]
+        to_incident = self.graph.travel_matrix(np.arange(len(self.graph)), nodes, self.weight).T
+        to_hospital = self.graph.travel_matrix(nodes, self.hospital_nodes, self.weight)
+        new = len(self.ids) - self._priced
+        self._to_incident = np.concatenate([self._to_incident, np.empty((new, len(self.graph)), dtype=np.float32)])
+        self._to_hospital = np.concatenate([self._to_hospital, np.empty((new, len(self.hospital_nodes)), dtype=np.float32)])
+        self._to_incident[rows] = to_incident
+        self._to_hospital[rows] = to_hospital
+        self._stale = np.concatenate([self._stale, np.zeros(new, dtype=bool)])
+        self._stale[rows] = False
+        self._priced = len(self.ids)
+
+    def costs(self, unit_nodes):
+        """(response, transport, cost) for units x incidents x hospitals
+
+        response is (units, incidents), transport (incidents, hospitals)
+        and cost their sum in seconds broadcast to the full tensor.
+        """
+        self._price()
+        response = self._to_incident[:, np.asarray(unit_nodes, dtype=np.intp)].T
+        transport = self._to_hospital
+        cost = response[:, :, None] + transport[None, :, :]
+        return response, transport, cost
+
+    def unserved(self, now=None):
+        """Cost of leaving each open incident without a unit"""
+        waited = 0.0 if now is None else np.maximum(now - self.reported, 0.0)
+        return self.priority * (self.unserved_seconds + waited)
+
+    def assign(self, unit_nodes, current=None, now=None):
+        """Best plan for units at unit_nodes, keeping current incident ids unless diverting saves time
+
+        current holds each unit's incident id, or -1 when it has none, and
+        now is the clock that incident waiting times are measured against.
+        """
+        unit_nodes = np.asarray(unit_nodes, dtype=np.intp)
+        empty = np.empty(0, dtype=np.intp)
+        if len(unit_nodes) == 0 or len(self.ids) == 0:
+            return Assignment(empty, empty, empty, np.empty(0), np.empty(0))
+        response, transport, cost = self.costs(unit_nodes)
+        # The hospital term does not depend on the unit, so each pair takes its best hospital
+        hospital = cost.argmin(axis=2)
+        matrix = np.take_along_axis(cost, hospital[:, :, None], axis=2)[:, :, 0].astype(np.float64)
+        if current is not None:
+            keep = np.asarray(current)[:, None] == self.ids[None, :]
+            matrix[keep] -= self.switch_penalty
+        matrix[~np.isfinite(matrix)] = UNREACHABLE
+        # One "unserved" row per incident, so every incident is matched and
+        # units go where leaving the incident open would cost the most
+        unserved = np.broadcast_to(self.unserved(now), (len(self.ids), len(self.ids)))
+        rows, cols = solve_assignment(np.vstack([matrix, unserved]))
+        served = rows < len(unit_nodes)
+        rows, cols = rows[served], cols[served]
+        reachable = matrix[rows, cols] < UNREACHABLE / 2
+        rows, cols = rows[reachable], cols[reachable]
+        return Assignment(rows, self.ids[cols], hospital[rows, cols],
+                          response[rows, cols].astype(np.float64),
+                          transport[cols, hospital[rows, cols]].astype(np.float64))
+
+
+class DispatchCenter:
+    """Runs a fleet of ambulance units against the simulation
+
+    Units start idle at the hospitals. Every tick they are re-matched to
+    open incidents: an idle unit that gets an incident starts an
+    emergency corridor to it and on to the chosen hospital, and a unit
+    still on its way may be diverted when that saves more than the switch
+    penalty. Reaching the incident resolves it and the unit carries on to
+    the hospital, where it becomes idle again.
+    """
+
+    def __init__(self, simulation, units_per_hospital=2, switch_penalty=SWITCH_PENALTY,
+                 refresh_seconds=REFRESH_SECONDS):
+        self.simulation = simulation
+        hospital_nodes = simulation.hospital_nodes
+        self.dispatcher = Dispatcher(simulation.graph, hospital_nodes, switch_penalty)
+        self.refresh_seconds = refresh_seconds
+        self._refreshed = -np.inf
+        count = len(hospital_nodes) * units_per_hospital
+        self.node = np.repeat(hospital_nodes, units_per_hospital)
+        self.state = np.full(count, IDLE, dtype=np.int8)
+        self.incident = np.full(count, -1, dtype=np.int64)
+        self.hospital = np.full(count, -1, dtype=np.intp)
+        self.emergency = np.full(count, -1, dtype=np.int64)
+        # Route slots of the incident and the hospital along each unit's corridor
+        self.scene_slot = np.zeros(count, dtype=np.intp)
+        self.last_slot = np.zeros(count, dtype=np.intp)
+        self.eta = np.zeros(count)
+
+    def __len__(self):
+        return len(self.node)
+
+    def report(self, place, priority="High"):
+        """Report an incident at an intersection or hospital name; returns its id"""
+        return self.dispatcher.report(self.simulation.node_index(place), priority, self.simulation.clock)
+
+    def _sync(self):
+        """Follow units along their corridors and release those that arrived"""
+        emergencies = self.simulation.emergencies
+        reached = []
+        for unit in np.flatnonzero(self.state != IDLE).tolist():
+            emergency = emergencies.get(int(self.emergency[unit]))
+            if emergency is None:
+                # The corridor ended at the hospital; one ended by hand leaves
+                # the unit where it was last seen and its incident open
+                if self.state[unit] == TRANSPORT or self.scene_slot[unit] == self.last_slot[unit]:
+                    self.node[unit] = self.dispatcher.hospital_nodes[self.hospital[unit]]
+                    if self.state[unit] == EN_ROUTE:
+                        reached.append(self.incident[unit])
+                self.state[unit], self.incident[unit], self.emergency[unit] = IDLE, -1, -1
+                continue
+            self.node[unit] = emergency["route_idx"][emergency["position"]]
+            if self.state[unit] == EN_ROUTE and emergency["position"] >= self.scene_slot[unit]:
+                self.state[unit] = TRANSPORT
+                reached.append(self.incident[unit])
+        if reached:
+            self.dispatcher.resolve(reached)
+
+    def _start(self, unit, incident_id, hospital):
+        """Open a corridor from the unit to the incident and on to the hospital"""
+        simulation = self.simulation
+        scene = int(self.dispatcher.nodes[np.searchsorted(self.dispatcher.ids, incident_id)])
+        to_scene, _ = simulation.graph.shortest_path(int(self.node[unit]), scene)
+        to_hospital, _ = simulation.graph.shortest_path(scene, int(self.dispatcher.hospital_nodes[hospital]))
+        if not to_scene or not to_hospital:
+            return False
+        path = to_scene + to_hospital[1:]
+        priority = _PRIORITY_NAMES.get(self.dispatcher.priority[np.searchsorted(self.dispatcher.ids, incident_id)], "High")
+        label = f"Unit {unit} → incident {incident_id} → {simulation.hospital_names[hospital]}"
+        self.emergency[unit] = simulation.activate_route([simulation.store.names[i] for i in path], priority, label)
+        self.state[unit], self.incident[unit], self.hospital[unit] = EN_ROUTE, incident_id, hospital
+        self.scene_slot[unit] = len(to_scene) - 1
+        self.last_slot[unit] = len(path) - 1
+        return True
+
+    def tick(self):
+        """Re-plan the fleet against open incidents; returns the Assignment used"""
+        simulation = self.simulation
+        self._sync()
+        if simulation.clock - self._refreshed >= self.refresh_seconds:
+            self.dispatcher.update_weights(
+                simulation.graph.travel_seconds(simulation.store.vehicles, simulation.store.congestion_level))
+            simulation.graph.update_weights(simulation.store.vehicles, simulation.store.congestion_level)
+            self._refreshed = simulation.clock
+        assignable = np.flatnonzero(self.state != TRANSPORT)
+        plan = self.dispatcher.assign(self.node[assignable], self.incident[assignable], simulation.clock)
+        planned = np.full(len(self), -1, dtype=np.int64)
+        planned[assignable[plan.units]] = plan.incidents
+        self.eta[:] = 0.0
+        self.eta[assignable[plan.units]] = plan.response + plan.transport
+
+        # Units that lost their incident to a closer one stop where they are
+        for unit in np.flatnonzero((self.state == EN_ROUTE) & (planned != self.incident)).tolist():
+            simulation.end(int(self.emergency[unit]), completed=False)
+            self.state[unit], self.incident[unit], self.emergency[unit] = IDLE, -1, -1
+        for k in np.flatnonzero(planned[assignable[plan.units]] != self.incident[assignable[plan.units]]).tolist():
+            self._start(int(assignable[plan.units[k]]), int(plan.incidents[k]), int(plan.hospitals[k]))
+        return plan
+
+    def status(self):
+        """Per-unit rows for display"""
+        names = self.simulation.store.names
+        hospitals = self.simulation.hospital_names
+        return [{"unit": unit, "state": UNIT_STATES[self.state[unit]], "at": names[self.node[unit]],
+                 "incident": int(self.incident[unit]) if self.incident[unit] >= 0 else None,
+                 "hospital": hospitals[self.hospital[unit]] if self.state[unit] != IDLE else None,
+                 "eta_min": round(float(self.eta[unit]) / 60, 1) if self.state[unit] != IDLE else None}
+                for unit in range(len(self))]
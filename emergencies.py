@@ -0,0 +1,121 @@
+import numpy as np
+
+# Corridor priority ranks. When two corridors claim the same intersection
+# the higher rank wins, then the earlier start time, then the lower id.
+ROUTE_PRIORITIES = {"Critical": 4, "Trauma": 3, "Emergency": 2, "High": 1}
+
+
+class EmergencyBatch:
+    """All active emergencies as flat arrays, routes stored CSR-style"""
+
+    def __init__(self):
+        self.ids = np.empty(0, dtype=np.int64)
+        self.route_nodes = np.empty(0, dtype=np.intp)
+        self.route_offsets = np.zeros(1, dtype=np.intp)
+        # Metres of the leg into each route slot, 0 for the first
+        self.leg_m = np.empty(0, dtype=np.float64)
+        self.start_time = np.empty(0, dtype=np.float64)
+        self.position = np.empty(0, dtype=np.intp)
+        # When each ambulance reached its current node, and the time budgeted for its next leg
+        self.leg_start = np.empty(0, dtype=np.float64)
+        self.leg_seconds = np.empty(0, dtype=np.float64)
+        self.priority = np.empty(0, dtype=np.int8)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def add(self, emergency_id, route_idx, start_time, priority="High", leg_m=None, leg_seconds=0.0):
+        """Append one emergency; route_idx is an array of intersection indices"""
+        route_idx = np.asarray(route_idx, dtype=np.intp)
+        self.ids = np.append(self.ids, emergency_id)
+        self.route_nodes = np.concatenate([self.route_nodes, route_idx])
+        self.route_offsets = np.append(self.route_offsets, self.route_offsets[-1] + len(route_idx))
+        self.leg_m = np.concatenate([self.leg_m, np.zeros(len(route_idx)) if leg_m is None else leg_m])
+        self.start_time = np.append(self.start_time, start_time)
+        self.position = np.append(self.position, 0)
+        self.leg_start = np.append(self.leg_start, start_time)
+        self.leg_seconds = np.append(self.leg_seconds, leg_seconds)
+        self.priority = np.append(self.priority, ROUTE_PRIORITIES.get(priority, 0))
+
+    def remove(self, emergency_ids):
+        """Drop the given emergencies, keeping the CSR layout compact"""
+        keep = ~np.isin(self.ids, emergency_ids)
+        lengths = self.route_lengths()
+        slots = np.repeat(keep, lengths)
+        self.route_nodes = self.route_nodes[slots]
+        self.leg_m = self.leg_m[slots]
+        self.route_offsets = np.concatenate([[0], np.cumsum(lengths[keep])]).astype(np.intp)
+        self.ids = self.ids[keep]
+        self.start_time = self.start_time[keep]
+        self.position = self.position[keep]
+        self.leg_start = self.leg_start[keep]
+        self.leg_seconds = self.leg_seconds[keep]
+        self.priority = self.priority[keep]
+
+    def route_lengths(self):
+        return np.diff(self.route_offsets)
+
+    def slots(self):
+        """(owner, hop) of every route slot: its batch index and its position along that route"""
+        lengths = self.route_lengths()
+        owner = np.repeat(np.arange(len(self)), lengths)
+        hop = np.arange(len(self.route_nodes)) - np.repeat(self.route_offsets[:-1], lengths)
+        return owner, hop
+
+    def slot(self, emergency_id):
+        """Position of an emergency in the batch arrays (ids stay sorted)"""
+        return int(np.searchsorted(self.ids, emergency_id))
+
+    def route(self, k):
+        """Route index array of the k-th emergency"""
+        return self.route_nodes[self.route_offsets[k]:self.route_offsets[k + 1]]
+
+
+class TickResult:
+    """Per-intersection outcome of one batch tick"""
+
+    def __init__(self, owner, on_route, passed, elapsed):
+        self.owner = owner          # index into the batch, -1 when unclaimed
+        self.on_route = on_route
+        self.passed = passed
+        self.elapsed = elapsed
+
+
+def batch_tick(store, batch, now):
+    """Compute corridor masks and overrides for every emergency in one pass"""
+    n = len(store)
+    owner = np.full(n, -1, dtype=np.intp)
+    passed = np.zeros(n, dtype=bool)
+    elapsed = np.zeros(n, dtype=np.float64)
+    if len(batch) == 0:
+        return TickResult(owner, owner >= 0, passed, elapsed)
+
+    # Expand per-emergency arrays to one entry per route slot
+    slot_owner, slot_hop = batch.slots()
+    nodes = batch.route_nodes
+    passed[nodes[slot_hop <= batch.position[slot_owner]]] = True
+
+    # Resolve shared intersections: sort slots by node, then by claim strength
+    order = np.lexsort((
+        batch.ids[slot_owner],
+        batch.start_time[slot_owner],
+        -batch.priority[slot_owner].astype(np.int16),
+        nodes,
+    ))
+    sorted_nodes = nodes[order]
+    first = np.ones(len(order), dtype=bool)
+    first[1:] = sorted_nodes[1:] != sorted_nodes[:-1]
+    winners = order[first]
+    owner[nodes[winners]] = slot_owner[winners]
+
+    on_route = owner >= 0
+    elapsed[on_route] = now - batch.start_time[owner[on_route]]
+    return TickResult(owner, on_route, passed, elapsed)
+
+
+def apply_tick(store, batch, now):
+    """Run one batch tick and write the overrides into the store"""
+    result = batch_tick(store, batch, now)
+    if len(batch):
+        store.apply_corridors(result.on_route, result.elapsed)
+    return result
@@ -0,0 +1,334 @@
+import numpy as np
+
+from network import DELHI_INTERSECTIONS, AMBULANCE_ROUTES, HOSPITALS, IntersectionStore
+from routing import RoadGraph, snap_to_polyline
+from spatial import GridIndex
+from route_cache import RouteCache
+from emergencies import EmergencyBatch, apply_tick
+from eta import EtaService
+from greenwave import LEAD_SECONDS, apply_wave
+from scheduler import EventQueue, ARRIVE, PHASE, END
+from traffic import QueueModel
+from gps import ARRIVAL_M, GPS_STALE_SECONDS, OFF_ROUTE_M, latest_per_emergency
+
+# Corridor policies: pre-empt a window ahead of each ambulance, or hold
+# every corridor green and the rest of the network red
+GREEN_WAVE, ALL_RED = "green_wave", "all_red"
+
+# Seconds of simulated time between phase ticks
+PHASE_SECONDS = 1.0
+# Simulated seconds between re-pricing road edges for route planning; lookups
+# in between are answered from the route cache without touching every edge
+ROUTE_REFRESH_SECONDS = 10.0
+
+
+class EmergencyView:
+    """Read helpers shared by the live simulation and its snapshots"""
+
+    @property
+    def emergency_active(self):
+        return bool(self.emergencies)
+
+    def elapsed(self, emergency_id):
+        return self.clock - self.emergencies[emergency_id]["start_time"]
+
+    def remaining(self, emergency_id):
+        """Seconds until the ambulance is expected to arrive, or until the time box ends"""
+        if self.emergency_seconds is None:
+            return max(0.0, self.emergencies[emergency_id]["arrival_time"] - self.clock)
+        return max(0.0, self.emergency_seconds - self.elapsed(emergency_id))
+
+    def progress(self, emergency_id):
+        """Percentage of the route's length covered: from GPS when tracked, else along the current leg"""
+        emergency = self.emergencies[emergency_id]
+        if "gps_progress" in emergency:
+            return emergency["gps_progress"]
+        if emergency["route_m"] <= 0:
+            return 100.0
+        along, position = emergency["along_m"], emergency["position"]
+        covered = along[position]
+        if position + 1 < len(along) and emergency["leg_seconds"] > 0:
+            share = min(1.0, (self.clock - emergency["leg_start"]) / emergency["leg_seconds"])
+            covered += share * (along[position + 1] - covered)
+        return min(100.0, covered / emergency["route_m"] * 100)
+
+    def current(self):
+        """Most recently started active emergency, or None"""
+        if not self.emergencies:
+            return None
+        return self.emergencies[max(self.emergencies)]
+
+    def current_location(self, emergency):
+        return emergency["route"][emergency["position"]]
+
+
+class Simulation(EmergencyView):
+    """Headless traffic simulation that owns intersection state, routes and clock
+
+    Work happens only when a scheduled event fires: ambulance arrivals,
+    emergency ends and phase ticks, which move traffic through the
+    queue model and update any corridors. Each leg of a route is timed
+    from its length and the load where it ends when the ambulance sets
+    off, unless hop_seconds fixes it. An emergency lasts until the
+    ambulance arrives, or emergency_seconds when that is given. The clock is virtual, so a
+    run can go faster than real time and replays identically for a seed.
+    """
+
+    def __init__(self, intersections=None, routes=None, seed=None,
+                 hop_seconds=None, emergency_seconds=None,
+                 phase_seconds=PHASE_SECONDS, store=None, graph=None, hospitals=None,
+                 corridor_policy=GREEN_WAVE, lead_seconds=LEAD_SECONDS):
+        # A prebuilt store and graph skip the dict conversion and the dense
+        # nearest-neighbour graph, which large networks cannot afford
+        self.store = store if store is not None else IntersectionStore.from_dict(intersections or DELHI_INTERSECTIONS)
+        self.routes = routes if routes is not None else AMBULANCE_ROUTES
+        self.graph = graph if graph is not None else RoadGraph.from_store(self.store, self.routes)
+        self.route_cache = RouteCache(self.graph)
+        self._routes_priced = -np.inf
+        self.hospitals = hospitals if hospitals is not None else HOSPITALS
+        self.hospital_names = list(self.hospitals)
+        self.hospital_index = GridIndex([h["lat"] for h in self.hospitals.values()],
+                                        [h["lon"] for h in self.hospitals.values()])
+        self.rng = np.random.default_rng(seed)
+        self.hop_seconds = hop_seconds
+        self.emergency_seconds = emergency_seconds
+        self.phase_seconds = phase_seconds
+        self.corridor_policy = corridor_policy
+        self.lead_seconds = lead_seconds
+        self.eta = EtaService(self.store, self.graph, hop_seconds)
+        self._hospital_nodes = None
+        # Queued vehicle-seconds avoided at red signals versus the all-red policy
+        self.delay_saved = 0.0
+        self.clock = 0.0
+        self.events = EventQueue()
+        self.batch = EmergencyBatch()
+        self.emergencies = {}
+        self.completed = 0
+        self._next_id = 0
+        self._next_phase = np.inf
+        self.traffic = QueueModel(self.graph, self.store.vehicles, self.store.congestion_level)
+        self.traffic.write(self.store, full=True)
+        self._traffic_clock = self.clock
+        self._schedule_phase(self.clock)
+
+    def activate(self, route_key):
+        """Start an emergency on a named route and return its id"""
+        info = self.routes[route_key]
+        return self.activate_route(info["route"], info["priority"], route_key)
+
+    def dispatch(self, origin, destination, priority="High"):
+        """Start an emergency on the fastest corridor between two places"""
+        route, _ = self.plan_route(origin, destination)
+        return self.activate_route(route, priority, f"{origin} → {destination}")
+
+    def plan_route(self, origin, destination):
+        """Fastest corridor as (intersection names, seconds) under current load
+
+        Origin and destination may be intersection or hospital names. Edge
+        costs are re-priced at most every ROUTE_REFRESH_SECONDS, evicting
+        only cached paths over edges that changed.
+        """
+        if self.clock - self._routes_priced >= ROUTE_REFRESH_SECONDS:
+            self.graph.update_weights(self.store.vehicles, self.store.congestion_level)
+            self.route_cache.refresh()
+            self._routes_priced = self.clock
+        path, seconds = self.route_cache.get(self.node_index(origin), self.node_index(destination))
+        return [self.store.names[i] for i in path], seconds
+
+    def nearest_hospitals(self, lat, lon, k=1):
+        """The k hospitals closest to a point as (name, metres) pairs"""
+        ids, dist = self.hospital_index.nearest(lat, lon, k)
+        return [(self.hospital_names[i], float(d)) for i, d in zip(ids.tolist(), dist.tolist())]
+
+    @property
+    def hospital_nodes(self):
+        """Graph node of each hospital, in hospital_names order"""
+        if self._hospital_nodes is None:
+            self._hospital_nodes = np.array([self.node_index(name) for name in self.hospital_names], dtype=np.intp)
+        return self._hospital_nodes
+
+    def hospital_etas(self):
+        """Seconds from every active ambulance (batch order) to every hospital, in one search"""
+        return self.eta.hospital_matrix(self.batch, self.clock, self.hospital_nodes)
+
+    def apply_gps(self, batch):
+        """Move emergencies to their latest GPS fix, snapped onto their route
+
+        Position and progress only move forward, so noisy fixes cannot pull
+        an ambulance back. The position is the last node passed; the next
+        one only counts once a fix is within ARRIVAL_M of it, so the
+        emergency ends at the destination rather than halfway along the
+        final leg. While an emergency's fixes are fresh its scheduled
+        arrivals are ignored; after GPS_STALE_SECONDS without one it goes
+        back to timed legs from the last node passed. Returns the number of
+        emergencies updated.
+        """
+        batch = batch[np.isin(batch["emergency"], list(self.emergencies))]
+        latest = latest_per_emergency(batch)
+        arrived = []
+        for eid, lat, lon in zip(latest["emergency"].tolist(), latest["lat"].tolist(), latest["lon"].tolist()):
+            emergency = self.emergencies[eid]
+            route_idx = emergency["route_idx"]
+            seg, t, offset, along = snap_to_polyline(lat, lon, self.store.lat[route_idx], self.store.lon[route_idx])
+            total = emergency["route_m"]
+            progress = 100.0 * min(1.0, along / total) if total > 0 else 100.0
+            position = seg
+            if len(route_idx) > 1 and (1.0 - t) * emergency["leg_m"][seg + 1] <= ARRIVAL_M:
+                position = seg + 1
+            emergency["gps_progress"] = max(emergency.get("gps_progress", 0.0), progress)
+            emergency["gps_time"] = self.clock
+            emergency["gps_offset_m"] = offset
+            emergency["off_route"] = offset > OFF_ROUTE_M
+            if position > emergency["position"]:
+                emergency["position"] = position
+                self.batch.position[self.batch.slot(eid)] = position
+                self._depart(eid, schedule=False)
+                if self._arrived(eid):
+                    arrived.append(eid)
+        for eid in arrived:
+            self.end(eid)
+        if len(latest):
+            self._schedule_phase(self.clock)
+        return len(latest)
+
+    def _expire_gps(self):
+        """Hand emergencies whose GPS feed went quiet back to scheduled legs"""
+        for eid, emergency in self.emergencies.items():
+            if "gps_time" in emergency and self.clock - emergency["gps_time"] >= GPS_STALE_SECONDS:
+                for key in ("gps_progress", "gps_time", "gps_offset_m", "off_route"):
+                    emergency.pop(key, None)
+                self._depart(eid)
+
+    def node_index(self, place):
+        """Graph node of an intersection name, or the node nearest a hospital"""
+        if place in self.store.index:
+            return self.store.index[place]
+        hospital = self.hospitals[place]
+        return self.graph.nearest_node(hospital["lat"], hospital["lon"])
+
+    def activate_route(self, route, priority="High", label=None):
+        """Start an emergency on an explicit list of intersections"""
+        emergency_id = self._next_id
+        self._next_id += 1
+        route_idx = self.store.indices(route)
+        leg_m, leg_seconds = self.eta.route_legs(route_idx)
+        route_seconds = float(leg_seconds.sum())
+        self.emergencies[emergency_id] = {
+            "id": emergency_id, "route_key": label or " → ".join(route), "route": list(route),
+            "route_idx": route_idx, "start_time": self.clock, "priority": priority,
+            "position": 0, "route_seconds": route_seconds, "arrival_time": self.clock + route_seconds,
+            "leg_m": leg_m, "along_m": np.cumsum(leg_m), "route_m": float(leg_m.sum()),
+        }
+        self.batch.add(emergency_id, route_idx, self.clock, priority, leg_m)
+
+        # Each arrival times the next leg, so later legs see the load of their time
+        self._depart(emergency_id)
+        if self.emergency_seconds is not None:
+            self.events.schedule(self.clock + self.emergency_seconds, END, emergency_id)
+        elif self._arrived(emergency_id):
+            self.events.schedule(self.clock, END, emergency_id)
+        self._schedule_phase(self.clock)
+        return emergency_id
+
+    def _depart(self, emergency_id, schedule=True):
+        """Start the leg after the current node, timed under the current load"""
+        emergency = self.emergencies[emergency_id]
+        slot = self.batch.slot(emergency_id)
+        nxt = emergency["position"] + 1
+        leg = 0.0
+        if nxt < len(emergency["route_idx"]):
+            leg = float(self.eta.leg_seconds(emergency["route_idx"][nxt:nxt + 1], emergency["leg_m"][nxt:nxt + 1])[0])
+            if schedule:
+                self.events.schedule(self.clock + leg, ARRIVE, emergency_id, nxt)
+        emergency["leg_start"] = self.batch.leg_start[slot] = self.clock
+        emergency["leg_seconds"] = self.batch.leg_seconds[slot] = leg
+
+    def _arrived(self, emergency_id):
+        emergency = self.emergencies[emergency_id]
+        return emergency["position"] >= len(emergency["route_idx"]) - 1
+
+    def end(self, emergency_id=None, completed=True):
+        """End one emergency, or all of them when no id is given
+
+        completed=False cancels instead, e.g. when a unit is diverted, and
+        leaves the completed count alone.
+        """
+        ended = list(self.emergencies) if emergency_id is None else [emergency_id]
+        for eid in ended:
+            del self.emergencies[eid]
+        self.batch.remove(ended)
+        if completed:
+            self.completed += len(ended)
+        if not self.emergencies:
+            # Signals go back to their cycles; queues recover through the traffic model
+            self.store.restore()
+
+    def step(self, dt):
+        """Advance the simulation clock by dt seconds, firing due events"""
+        target = self.clock + dt
+        for event in self.events.pop_until(target):
+            self.clock = event.time
+            self._handle(event)
+        self.clock = target
+
+    def run(self, seconds):
+        """Run for a span of simulated time without any wall-clock waiting"""
+        self.step(seconds)
+
+    def _handle(self, event):
+        # Events for emergencies that were ended early are simply dropped
+        if event.kind == PHASE:
+            # An earlier phase pulled in by an activation or GPS fix supersedes this one
+            if event.time != self._next_phase:
+                return
+            self._next_phase = np.inf
+            self._expire_gps()
+            if self.emergencies:
+                eta = self.eta.slot_eta(self.batch, self.clock)
+                for eid, seconds in zip(self.batch.ids.tolist(), self.eta.remaining(self.batch, self.clock, eta).tolist()):
+                    self.emergencies[eid]["arrival_time"] = self.clock + seconds
+                if self.corridor_policy == GREEN_WAVE:
+                    _, saved = apply_wave(self.store, self.batch, eta, self.clock, self.phase_seconds,
+                                          self.lead_seconds)
+                    self.delay_saved += saved
+                else:
+                    apply_tick(self.store, self.batch, self.clock)
+            self.traffic.step(self.store.status, self.clock - self._traffic_clock)
+            self._traffic_clock = self.clock
+            self.traffic.write(self.store)
+            self._schedule_phase(self.clock + self.phase_seconds)
+        elif event.emergency_id not in self.emergencies:
+            return
+        elif event.kind == ARRIVE:
+            emergency = self.emergencies[event.emergency_id]
+            # GPS moves tracked ambulances, and it may have passed this node already
+            if "gps_time" in emergency or event.data != emergency["position"] + 1:
+                return
+            self.emergencies[event.emergency_id]["position"] = event.data
+            self.batch.position[self.batch.slot(event.emergency_id)] = event.data
+            self._depart(event.emergency_id)
+            if self.emergency_seconds is None and self._arrived(event.emergency_id):
+                self.end(event.emergency_id)
+        elif event.kind == END:
+            self.end(event.emergency_id)
+
+    def _schedule_phase(self, time):
+        if time < self._next_phase:
+            self.events.schedule(time, PHASE)
+            self._next_phase = time
+
+    def snapshot(self, version=0):
+        return Snapshot(self, version)
+
+
+class Snapshot(EmergencyView):
+    """Immutable view of the simulation at one instant, safe to share across threads"""
+
+    def __init__(self, sim, version):
+        self.version = version
+        self.clock = sim.clock
+        self.completed = sim.completed
+        self.delay_saved = sim.delay_saved
+        self.emergency_seconds = sim.emergency_seconds
+        self.store = sim.store.frozen_copy()
+        self.emergencies = {eid: dict(e) for eid, e in sim.emergencies.items()}
@@ -0,0 +1,102 @@
+import numpy as np
+
+from routing import haversine_m, leg_cost
+
+
+class EtaService:
+    """Travel times along routes from segment lengths and live intersection delay
+
+    A leg is priced like a road edge: its haversine length at free-flow
+    speed, stretched by congestion at the intersection it enters, plus
+    queueing delay for the vehicles waiting there. Load is read from the
+    store on every call, so estimates follow the traffic model. With a
+    fixed hop_seconds every leg takes that long instead.
+    """
+
+    def __init__(self, store, graph, hop_seconds=None):
+        self.store = store
+        self.graph = graph
+        self.hop_seconds = hop_seconds
+
+    def leg_metres(self, route_idx):
+        """Metres of the leg into each route node, 0 for the first"""
+        route_idx = np.asarray(route_idx, dtype=np.intp)
+        legs = np.zeros(len(route_idx))
+        if len(route_idx) > 1:
+            lat, lon = self.store.lat, self.store.lon
+            legs[1:] = haversine_m(lat[route_idx[:-1]], lon[route_idx[:-1]], lat[route_idx[1:]], lon[route_idx[1:]])
+        return legs
+
+    def leg_seconds(self, nodes, leg_m):
+        """Seconds of each leg into nodes under the current load"""
+        if self.hop_seconds is not None:
+            return np.full(len(nodes), float(self.hop_seconds))
+        return leg_cost(leg_m, self.store.vehicles[nodes], self.store.congestion_level[nodes])
+
+    def route_legs(self, route_idx):
+        """(metres, seconds) of the leg into each route node; the first is (0, 0)"""
+        route_idx = np.asarray(route_idx, dtype=np.intp)
+        leg_m = self.leg_metres(route_idx)
+        seconds = self.leg_seconds(route_idx, leg_m)
+        if len(seconds):
+            seconds[0] = 0.0
+        return leg_m, seconds
+
+    def route_seconds(self, routes):
+        """Seconds to drive each route end to end, in one pass over all their legs"""
+        routes = [np.asarray(route, dtype=np.intp) for route in routes]
+        lengths = np.array([len(route) for route in routes], dtype=np.intp)
+        if not lengths.any():
+            return np.zeros(len(routes))
+        nodes = np.concatenate(routes)
+        starts = np.concatenate([[0], np.cumsum(lengths)[:-1]])
+        lat, lon = self.store.lat, self.store.lon
+        leg_m = np.zeros(len(nodes))
+        leg_m[1:] = haversine_m(lat[nodes[:-1]], lon[nodes[:-1]], lat[nodes[1:]], lon[nodes[1:]])
+        seconds = self.leg_seconds(nodes, leg_m)
+        # The first node of each route has no leg into it
+        seconds[starts[lengths > 0]] = 0.0
+        totals = np.zeros(len(routes))
+        totals[lengths > 0] = np.add.reduceat(seconds, starts[lengths > 0])
+        return totals
+
+    def slot_eta(self, batch, now):
+        """Seconds until every active ambulance reaches each of its route slots
+
+        CSR-aligned with batch.route_nodes; 0 for the slot an ambulance is
+        at and those behind it. The current leg uses the time budgeted when
+        it began, later legs are priced under the current load.
+        """
+        if len(batch) == 0:
+            return np.empty(0)
+        owner, slot_hop = batch.slots()
+        ahead_legs = np.cumsum(self.leg_seconds(batch.route_nodes, batch.leg_m))
+        next_slot = np.minimum(batch.route_offsets[:-1] + batch.position + 1, batch.route_offsets[1:] - 1)
+        current = np.maximum(batch.leg_seconds - (now - batch.leg_start), 0.0)
+        eta = current[owner] + ahead_legs - ahead_legs[next_slot][owner]
+        eta[slot_hop <= batch.position[owner]] = 0.0
+        return eta
+
+    def remaining(self, batch, now, eta=None):
+        """Seconds until each active ambulance reaches the end of its route"""
+        if len(batch) == 0:
+            return np.empty(0)
+        eta = self.slot_eta(batch, now) if eta is None else eta
+        return eta[batch.route_offsets[1:] - 1]
+
+    def hospital_matrix(self, batch, now, hospital_nodes):
+        """Seconds from every active ambulance to every hospital node, shape (emergencies, hospitals)
+
+        Each ambulance finishes its current leg, then takes the fastest
+        road path under the current load; all pairs come from one
+        multi-source search.
+        """
+        if len(batch) == 0:
+            return np.empty((0, len(hospital_nodes)))
+        last = batch.route_offsets[1:] - 1
+        next_slot = np.minimum(batch.route_offsets[:-1] + batch.position + 1, last)
+        origins = batch.route_nodes[next_slot]
+        moving = next_slot > batch.route_offsets[:-1] + batch.position
+        current = np.where(moving, np.maximum(batch.leg_seconds - (now - batch.leg_start), 0.0), 0.0)
+        weight = self.graph.travel_seconds(self.store.vehicles, self.store.congestion_level)
+        return current[:, None] + self.graph.travel_matrix(origins, hospital_nodes, weight)
@@ -0,0 +1,234 @@
+import mmap
+import os
+import threading
+
+import numpy as np
+
+from emergencies import ROUTE_PRIORITIES
+
+# Record kinds
+CHECKPOINT, STATE, ACTIVATE, END, SIGNAL, VEHICLES = range(6)
+KIND_NAMES = ["checkpoint", "state", "activate", "end", "signal", "vehicles"]
+
+# One fixed-size, packed record per event. Field use by kind:
+#   CHECKPOINT  node = number of STATE records that follow
+#   STATE       full state of one intersection
+#   ACTIVATE    one record per route node; vehicles = hop index,
+#               status = ROUTE_PRIORITIES rank
+#   END         emergency only
+#   SIGNAL      status changed (vehicles and congestion carried along)
+#   VEHICLES    vehicles or congestion changed, status unchanged
+EVENT_DTYPE = np.dtype([
+    ("time", "<f8"),
+    ("version", "<i8"),
+    ("kind", "u1"),
+    ("node", "<i4"),
+    ("status", "i1"),
+    ("vehicles", "<i4"),
+    ("congestion", "<f4"),
+    ("emergency", "<i8"),
+])
+
+# Wall-clock seconds between full-state checkpoints, which bound replay work
+CHECKPOINT_SECONDS = 300
+# Records processed per step while replaying, which bounds replay memory
+REPLAY_CHUNK = 1 << 20
+
+
+def _records(n):
+    records = np.zeros(n, dtype=EVENT_DTYPE)
+    records["node"] = -1
+    records["emergency"] = -1
+    return records
+
+
+class EventLog:
+    """Append-only binary log of simulation events
+
+    Each published snapshot appends the emergencies that started or ended
+    and one record per intersection whose status, vehicles or congestion
+    moved. A full-state checkpoint is written when the log is opened and
+    every CHECKPOINT_SECONDS, so replay never has to start from the top.
+    """
+
+    def __init__(self, path, checkpoint_seconds=CHECKPOINT_SECONDS):
+        self.path = path
+        self.checkpoint_seconds = checkpoint_seconds
+        self._file = open(path, "ab")
+        self._last_checkpoint = None
+
+    def close(self):
+        self._file.close()
+
+    def record(self, time, previous, current):
+        """Append the events between two snapshots"""
+        batches = []
+        if self._last_checkpoint is None or time - self._last_checkpoint >= self.checkpoint_seconds:
+            batches.append(self._checkpoint(current.store))
+            self._last_checkpoint = time
+
+        for eid in previous.emergencies.keys() - current.emergencies.keys():
+            end = _records(1)
+            end["kind"] = END
+            end["emergency"] = eid
+            batches.append(end)
+        for eid in current.emergencies.keys() - previous.emergencies.keys():
+            emergency = current.emergencies[eid]
+            route_idx = emergency["route_idx"]
+            activate = _records(len(route_idx))
+            activate["kind"] = ACTIVATE
+            activate["node"] = route_idx
+            activate["vehicles"] = np.arange(len(route_idx))
+            activate["status"] = ROUTE_PRIORITIES.get(emergency["priority"], 0)
+            activate["emergency"] = eid
+            batches.append(activate)
+
+        before, after = previous.store, current.store
+        signal = before.status != after.status
+        moved = signal | (before.vehicles != after.vehicles) | (before.congestion_level != after.congestion_level)
+        nodes = np.flatnonzero(moved)
+        if len(nodes):
+            updates = _records(len(nodes))
+            updates["kind"] = np.where(signal[nodes], SIGNAL, VEHICLES)
+            updates["node"] = nodes
+            updates["status"] = after.status[nodes]
+            updates["vehicles"] = after.vehicles[nodes]
+            updates["congestion"] = after.congestion_level[nodes]
+            batches.append(updates)
+
+        if batches:
+            records = np.concatenate(batches)
+            records["time"] = time
+            records["version"] = current.version
+            self._file.write(records.tobytes())
+            self._file.flush()
+
+    def _checkpoint(self, store):
+        n = len(store)
+        records = _records(n + 1)
+        records[0]["kind"] = CHECKPOINT
+        records[0]["node"] = n
+        state = records[1:]
+        state["kind"] = STATE
+        state["node"] = np.arange(n)
+        state["status"] = store.status
+        state["vehicles"] = store.vehicles
+        state["congestion"] = store.congestion_level
+        return records
+
+
+class LogReplay:
+    """Memory-mapped reader that reconstructs state from an EventLog file
+
+    Records are viewed in place through mmap; only the span between the
+    nearest checkpoint and the requested time is touched, in chunks. The
+    incident index is built incrementally, so a long-lived reader only
+    scans records appended since the last incidents() call. One reader
+    may be shared across threads.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, "rb")
+        self._map = None
+        self._lock = threading.Lock()
+        self.records = np.empty(0, dtype=EVENT_DTYPE)
+        self._incidents = []
+        self._open_incidents = {}
+        self._scanned = 0
+        self.refresh()
+
+    def refresh(self):
+        """Re-map the file to pick up records appended since opening"""
+        with self._lock:
+            size = os.fstat(self._file.fileno()).st_size
+            count = size // EVENT_DTYPE.itemsize  # ignore a partially written tail
+            if count == len(self.records):
+                return self
+            # The old map stays alive while other readers still hold views of it
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            self.records = np.frombuffer(self._map, dtype=EVENT_DTYPE, count=count)
+        return self
+
+    def close(self):
+        self.records = np.empty(0, dtype=EVENT_DTYPE)
+        if self._map is not None:
+            self._map.close()
+        self._file.close()
+
+    def __len__(self):
+        return len(self.records)
+
+    def time_range(self):
+        if not len(self.records):
+            return None
+        return float(self.records["time"][0]), float(self.records["time"][-1])
+
+    def state_at(self, time):
+        """Intersection status, vehicles and congestion as of time
+
+        Returns None when the log has no checkpoint at or before time.
+        """
+        records = self.records
+        end = int(np.searchsorted(records["time"], time, side="right"))
+        start = self._checkpoint_before(records, end)
+        if start is None:
+            return None
+        n = int(records[start]["node"])
+        state = {
+            "status": np.zeros(n, dtype=np.int8),
+            "vehicles": np.zeros(n, dtype=np.int32),
+            "congestion_level": np.zeros(n, dtype=np.float32),
+        }
+        for lo in range(start + 1, end, REPLAY_CHUNK):
+            chunk = records[lo:min(lo + REPLAY_CHUNK, end)]
+            chunk = chunk[np.isin(chunk["kind"], (STATE, SIGNAL, VEHICLES))]
+            # Keep the last record of each node within the chunk
+            nodes = chunk["node"][::-1]
+            _, first = np.unique(nodes, return_index=True)
+            latest = chunk[::-1][first]
+            state["status"][latest["node"]] = latest["status"]
+            state["vehicles"][latest["node"]] = latest["vehicles"]
+            state["congestion_level"][latest["node"]] = latest["congestion"]
+        return state
+
+    def incidents(self):
+        """Logged emergencies, oldest first, as dicts of id, start, end, priority and route_idx
+
+        Emergency ids restart with the process, so an END closes the most
+        recent incident that carries its id. Only records added since the
+        previous call are read.
+        """
+        priority_names = {rank: name for name, rank in ROUTE_PRIORITIES.items()}
+        with self._lock:
+            records = self.records
+            for lo in range(self._scanned, len(records), REPLAY_CHUNK):
+                chunk = records[lo:lo + REPLAY_CHUNK]
+                events = chunk[np.isin(chunk["kind"], (ACTIVATE, END))]
+                for record in events.tolist():
+                    time, _, kind, node, status, _, _, eid = record
+                    incident = self._open_incidents.get(eid)
+                    if kind == ACTIVATE:
+                        if incident is None or incident["start"] != time:
+                            incident = {"id": eid, "start": time, "end": None,
+                                        "priority": priority_names.get(status), "route_idx": []}
+                            self._open_incidents[eid] = incident
+                            self._incidents.append(incident)
+                        incident["route_idx"].append(node)
+                    elif incident is not None:
+                        incident["end"] = time
+                        del self._open_incidents[eid]
+            self._scanned = len(records)
+            return [dict(incident, route_idx=list(incident["route_idx"])) for incident in self._incidents]
+
+    @staticmethod
+    def _checkpoint_before(records, end):
+        """Index of the last CHECKPOINT record before end, scanning backwards"""
+        hi = end
+        while hi > 0:
+            lo = max(0, hi - REPLAY_CHUNK)
+            found = np.flatnonzero(records["kind"][lo:hi] == CHECKPOINT)
+            if len(found):
+                return lo + int(found[-1])
+            hi = lo
+        return None
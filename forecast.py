@@ -0,0 +1,124 @@
+import numpy as np
+
+# Smoothing half-lives in simulated seconds for the level and the trend
+LEVEL_HALF_LIFE = 60.0
+TREND_HALF_LIFE = 300.0
+# Trends fade with this time constant, so long horizons stay bounded
+TREND_DAMPING_SECONDS = 600.0
+# Horizons shown in the Predictions section, in seconds
+FORECAST_HORIZONS = (300, 600, 900)
+
+
+class HoltForecaster:
+    """Damped Holt linear-trend smoothing of many series in one array
+
+    The level and trend have the shape of the values passed to update(),
+    so every intersection is smoothed in the same vectorized step.
+    Smoothing weights come from half-lives and the time since the last
+    update, which keeps irregular ticks consistent. The trend is damped
+    exponentially, so a forecast h seconds ahead adds
+    trend * tau * (1 - exp(-h / tau)) to the level.
+    """
+
+    def __init__(self, level_half_life=LEVEL_HALF_LIFE, trend_half_life=TREND_HALF_LIFE,
+                 damping_seconds=TREND_DAMPING_SECONDS):
+        self.level_half_life = level_half_life
+        self.trend_half_life = trend_half_life
+        self.damping_seconds = damping_seconds
+        self.level = None
+        self.trend = None
+        self.time = None
+
+    def _reach(self, horizons):
+        """Seconds of trend accumulated over each horizon under damping"""
+        tau = self.damping_seconds
+        return tau * -np.expm1(-np.asarray(horizons, dtype=np.float64) / tau)
+
+    def update(self, time, values):
+        values = np.asarray(values, dtype=np.float64)
+        if self.level is None or self.level.shape != values.shape:
+            self.level = values.copy()
+            self.trend = np.zeros_like(self.level)
+            self.time = time
+            return
+        dt = time - self.time
+        if dt <= 0:
+            return
+        alpha = -np.expm1(-np.log(2) * dt / self.level_half_life)
+        beta = -np.expm1(-np.log(2) * dt / self.trend_half_life)
+        predicted = self.level + self.trend * self._reach(dt)
+        level = predicted + alpha * (values - predicted)
+        self.trend += beta * ((level - self.level) / dt - self.trend)
+        self.level = level
+        self.time = time
+
+    def forecast(self, horizons):
+        """Predicted values at each horizon, shape (len(horizons),) + series shape"""
+        reach = self._reach(np.atleast_1d(horizons))
+        return self.level + reach.reshape((-1,) + (1,) * self.level.ndim) * self.trend
+
+
+class TrafficForecast:
+    """Per-intersection congestion and vehicle forecasts with route ETAs
+
+    Congestion and vehicles are stacked into one (2, n) array and
+    smoothed by a single HoltForecaster each tick. Route ETAs price each
+    route's edges with the forecast load using the graph's own edge cost.
+    """
+
+    def __init__(self, horizons=FORECAST_HORIZONS, **kwargs):
+        self.horizons = tuple(horizons)
+        self.model = HoltForecaster(**kwargs)
+
+    @property
+    def ready(self):
+        return self.model.level is not None
+
+    def update(self, time, vehicles, congestion_level):
+        self.model.update(time, np.stack([np.asarray(congestion_level, dtype=np.float64),
+                                          np.asarray(vehicles, dtype=np.float64)]))
+
+    def load(self, horizons=None):
+        """Forecast (congestion, vehicles), each shaped (len(horizons), n)"""
+        predicted = self.model.forecast(self.horizons if horizons is None else horizons)
+        return np.clip(predicted[:, 0], 0, 1), np.maximum(predicted[:, 1], 0)
+
+    def route_eta(self, graph, routes, horizons=None):
+        """Seconds to drive each route (node index arrays) at each horizon, shape (H, R)
+
+        All routes' edges are priced together and summed per route with
+        one reduceat.
+        """
+        horizons = self.horizons if horizons is None else horizons
+        congestion, vehicles = self.load(horizons)
+        lengths = np.array([max(len(route) - 1, 0) for route in routes], dtype=np.intp)
+        eta = np.zeros((len(congestion), len(routes)))
+        if not lengths.any():
+            return eta
+        legs = [np.asarray(route, dtype=np.intp) for route in routes if len(route) > 1]
+        edges = graph.edge_ids(np.concatenate([leg[:-1] for leg in legs]),
+                               np.concatenate([leg[1:] for leg in legs]))
+        seconds = np.stack([graph.travel_seconds(v, c, edges) for c, v in zip(congestion, vehicles)])
+        # Hops without a road edge are priced as missing (inf) rather than free
+        seconds[:, edges < 0] = np.inf
+        starts = np.concatenate([[0], np.cumsum(lengths[lengths > 0])[:-1]])
+        eta[:, lengths > 0] = np.add.reduceat(seconds, starts, axis=1)
+        return eta
+
+    def predict(self, graph, routes=(), horizons=None):
+        """Network-wide forecast summary for the Predictions section
+
+        Returns horizons, the mean congestion now and at each horizon, the
+        per-node congestion forecast and the ETA of each route, with the
+        current smoothed state as horizon 0.
+        """
+        horizons = (0,) + (self.horizons if horizons is None else tuple(horizons))
+        if not self.ready:
+            return None
+        congestion, _ = self.load(horizons)
+        return {
+            "horizons": np.array(horizons),
+            "network_congestion": congestion.mean(axis=1),
+            "congestion": congestion,
+            "route_eta": self.route_eta(graph, routes, horizons),
+        }
@@ -0,0 +1,184 @@
+import argparse
+import time
+
+import numpy as np
+
+from emergencies import ROUTE_PRIORITIES
+from network import DELHI_INTERSECTIONS, IntersectionStore, MIN_VEHICLES, MAX_VEHICLES
+from routing import RoadGraph
+
+# Bounding box of the hand-coded intersections, padded by half its size
+_lat = [row["lat"] for row in DELHI_INTERSECTIONS.values()]
+_lon = [row["lon"] for row in DELHI_INTERSECTIONS.values()]
+_pad_lat = (max(_lat) - min(_lat)) / 2
+_pad_lon = (max(_lon) - min(_lon)) / 2
+DELHI_BBOX = (min(_lat) - _pad_lat, max(_lat) + _pad_lat, min(_lon) - _pad_lon, max(_lon) + _pad_lon)
+# Connaught Place, the densest point of the generated city
+CITY_CENTRE = (DELHI_INTERSECTIONS["Connaught Place"]["lat"], DELHI_INTERSECTIONS["Connaught Place"]["lon"])
+
+ZONE_CENTRES = {
+    "Central": (28.622, 77.223),
+    "Old Delhi": (28.653, 77.237),
+    "West": (28.649, 77.155),
+    "South": (28.558, 77.248),
+    "North": (28.700, 77.200),
+    "East": (28.630, 77.290),
+}
+
+# Ring roads as fractions of the half-width of the box
+RING_RADII = (0.25, 0.5, 0.8)
+# Node density falls off as exp(-DENSITY_FALLOFF * r^2) from the centre
+DENSITY_FALLOFF = 1.5
+# One hospital per this many intersections, with a floor
+NODES_PER_HOSPITAL = 25_000
+MIN_HOSPITALS = 8
+
+
+def _lattice(n, rng):
+    """Pick n cells of a square lattice, denser towards the centre
+
+    Returns the lattice side, row and column of each kept cell (row-major
+    order) and the normalized distance of each cell from the centre.
+    """
+    # Mean keep weight of the falloff over the unit square, for sizing the lattice
+    probe = np.linspace(-1, 1, 201)
+    mean_weight = np.exp(-DENSITY_FALLOFF * (probe[:, None] ** 2 + probe[None, :] ** 2)).mean()
+    side = max(2, int(np.ceil(np.sqrt(n / mean_weight))))
+    axis = (np.arange(side) + 0.5) / side * 2 - 1
+    weight = np.exp(-DENSITY_FALLOFF * (axis[:, None] ** 2 + axis[None, :] ** 2)).ravel()
+    # Weighted sampling without replacement: keep the n largest u^(1/w)
+    keys = np.log(rng.random(side * side)) / weight
+    cells = np.sort(np.argpartition(keys, -n)[-n:])
+    row, col = np.divmod(cells, side)
+    return side, row, col
+
+
+def _road_edges(row, col, x, y):
+    """Streets join consecutive kept cells along rows and columns; rings join by angle"""
+    same_row = np.flatnonzero(row[1:] == row[:-1])
+    src = [same_row]
+    dst = [same_row + 1]
+
+    by_col = np.lexsort((row, col))
+    same_col = np.flatnonzero(col[by_col][1:] == col[by_col][:-1])
+    src.append(by_col[same_col])
+    dst.append(by_col[same_col + 1])
+
+    radius = np.hypot(x, y)
+    angle = np.arctan2(y, x)
+    on_ring = np.zeros(len(row), dtype=bool)
+    band = 1.5 * 2 / max(row.max() + 1, 2)
+    for ring in RING_RADII:
+        members = np.flatnonzero(np.abs(radius - ring) < band)
+        if len(members) < 3:
+            continue
+        members = members[np.argsort(angle[members])]
+        src.append(members)
+        dst.append(np.roll(members, -1))
+        on_ring[members] = True
+    return np.concatenate(src), np.concatenate(dst), on_ring
+
+
+def generate_network(n, seed=None, routes=4):
+    """Seedable synthetic Delhi-like city of n intersections
+
+    Intersections sit on a jittered lattice whose density falls off from
+    Connaught Place. Streets follow lattice rows and columns, three ring
+    roads circle the centre, and zones are the nearest of ZONE_CENTRES.
+    Congestion rises towards the centre and drives vehicle counts;
+    ring-road and heavily congested junctions get high priority.
+
+    Returns (store, graph, hospitals, routes) for Simulation(store=...,
+    graph=..., hospitals=..., routes=...). Route planning runs one
+    shortest-path search per route, which dominates on very large cities.
+    """
+    rng = np.random.default_rng(seed)
+    side, row, col = _lattice(n, rng)
+    # Normalized coordinates in [-1, 1], jittered within each cell
+    x = (col + 0.5 + rng.uniform(-0.35, 0.35, n)) / side * 2 - 1
+    y = (row + 0.5 + rng.uniform(-0.35, 0.35, n)) / side * 2 - 1
+    lat_min, lat_max, lon_min, lon_max = DELHI_BBOX
+    half_lat = max(CITY_CENTRE[0] - lat_min, lat_max - CITY_CENTRE[0])
+    half_lon = max(CITY_CENTRE[1] - lon_min, lon_max - CITY_CENTRE[1])
+    lat = CITY_CENTRE[0] + y * half_lat
+    lon = CITY_CENTRE[1] + x * half_lon
+
+    src, dst, on_ring = _road_edges(row, col, x, y)
+
+    zone_names = list(ZONE_CENTRES)
+    centres = np.array(list(ZONE_CENTRES.values()))
+    zone = np.argmin((lat[:, None] - centres[:, 0]) ** 2 + (lon[:, None] - centres[:, 1]) ** 2, axis=1)
+
+    centrality = np.exp(-DENSITY_FALLOFF * (x ** 2 + y ** 2))
+    congestion = rng.beta(1.5 + 4 * centrality, 4 - 2 * centrality).astype(np.float32)
+    vehicles = MIN_VEHICLES + congestion * (MAX_VEHICLES - MIN_VEHICLES) + rng.normal(0, 4, n)
+    vehicles = np.clip(np.rint(vehicles), MIN_VEHICLES, MAX_VEHICLES).astype(np.int32)
+    normal_cycle = rng.choice(3, size=n, p=[0.45, 0.15, 0.40]).astype(np.int8)
+    priority = np.digitize(congestion, [0.4, 0.7]).astype(np.int8)
+    priority[on_ring] = 2
+
+    zone_labels = np.array(zone_names, dtype=object)[zone]
+    names = [f"{label} Jn {i}" for i, label in enumerate(zone_labels.tolist())]
+    store = IntersectionStore(
+        names, lat, lon, status=normal_cycle.copy(), normal_cycle=normal_cycle,
+        vehicles=vehicles, congestion_level=congestion, zone=zone,
+        zone_names=zone_names, priority=priority,
+    )
+    graph = RoadGraph(lat, lon, src, dst)
+    graph.update_weights(store.vehicles, store.congestion_level)
+
+    # Hospitals favour dense areas, like the city they stand in for
+    count = min(n, max(MIN_HOSPITALS, n // NODES_PER_HOSPITAL))
+    sites = rng.choice(n, size=count, replace=False, p=centrality / centrality.sum())
+    hospitals = {f"{zone_names[zone[i]]} Hospital {k + 1}": {"lat": float(lat[i]), "lon": float(lon[i])}
+                 for k, i in enumerate(sites.tolist())}
+    return store, graph, hospitals, _plan_routes(store, graph, hospitals, sites, routes, rng)
+
+
+def _plan_routes(store, graph, hospitals, sites, count, rng):
+    """Named routes between random hospital pairs, in the AMBULANCE_ROUTES layout"""
+    hospital_names = list(hospitals)
+    priorities = list(ROUTE_PRIORITIES)
+    planned = {}
+    for _ in range(count * 3):
+        if len(planned) == count or len(sites) < 2:
+            break
+        a, b = rng.choice(len(sites), size=2, replace=False)
+        path, _ = graph.shortest_path(int(sites[a]), int(sites[b]))
+        if len(path) < 2:
+            continue
+        priority = priorities[rng.integers(len(priorities))]
+        key = f"🚑 {hospital_names[a]} → {hospital_names[b]} ({priority})"
+        planned[key] = {
+            "route": [store.names[i] for i in path],
+            "hospital": hospital_names[a], "destination": hospital_names[b],
+            "priority": priority,
+        }
+    return planned
+
+
+def synthetic_simulation(n, seed=None, routes=4, **kwargs):
+    """Simulation over a generated city; extra keyword arguments go to Simulation"""
+    from engine import Simulation
+    store, graph, hospitals, planned = generate_network(n, seed, routes)
+    return Simulation(routes=planned, seed=seed, store=store, graph=graph, hospitals=hospitals, **kwargs)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic Delhi-like network")
+    parser.add_argument("nodes", type=int)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--routes", type=int, default=4)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    store, graph, hospitals, routes = generate_network(args.nodes, args.seed, args.routes)
+    elapsed = time.perf_counter() - start
+    print(f"{len(store)} intersections, {graph.num_edges} directed edges, "
+          f"{len(hospitals)} hospitals, {len(routes)} routes in {elapsed:.2f} s")
+    for zone, count in zip(store.zone_names, np.bincount(store.zone, minlength=len(store.zone_names))):
+        print(f"  {zone:<10} {count}")
+
+
+if __name__ == "__main__":
+    main()
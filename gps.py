@@ -0,0 +1,225 @@
+import socket
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+from routing import EARTH_RADIUS_M
+
+# One GPS fix from an ambulance
+PING_DTYPE = np.dtype([
+    ("time", np.float64),
+    ("emergency", np.int64),
+    ("lat", np.float64),
+    ("lon", np.float64),
+])
+
+# Pings held between ticks before producers are made to wait
+QUEUE_CAPACITY = 65536
+# Fixes further than this from the assigned route are flagged off-route
+OFF_ROUTE_M = 150.0
+# A fix this close to the end of a leg counts as reaching the node there
+ARRIVAL_M = 30.0
+# Simulated seconds without a fix before an emergency falls back to its scheduled legs
+GPS_STALE_SECONDS = 30.0
+
+
+def pings(times, emergencies, lat, lon):
+    """Pack parallel sequences into a PING_DTYPE array"""
+    out = np.empty(len(times), dtype=PING_DTYPE)
+    out["time"], out["emergency"], out["lat"], out["lon"] = times, emergencies, lat, lon
+    return out
+
+
+def parse_lines(lines):
+    """Pings from "time,emergency,lat,lon" text lines; malformed lines are skipped"""
+    rows = []
+    for line in lines:
+        parts = line.strip().split(",")
+        if len(parts) != 4:
+            continue
+        try:
+            rows.append((float(parts[0]), int(parts[1]), float(parts[2]), float(parts[3])))
+        except ValueError:
+            continue
+    return np.array(rows, dtype=PING_DTYPE)
+
+
+def latest_per_emergency(batch):
+    """The newest ping of each emergency in a batch"""
+    if len(batch) == 0:
+        return batch
+    batch = batch[np.lexsort((batch["time"], batch["emergency"]))]
+    last = np.ones(len(batch), dtype=bool)
+    last[:-1] = batch["emergency"][1:] != batch["emergency"][:-1]
+    return batch[last]
+
+
+class PingQueue:
+    """Bounded queue of ping batches shared by producers and the simulation
+
+    put() blocks while the queue is full, which pushes back on fast
+    producers; with a timeout the batch is dropped and counted instead.
+    The simulation drains everything queued once per tick.
+    """
+
+    def __init__(self, capacity=QUEUE_CAPACITY):
+        self.capacity = capacity
+        self._batches = deque()
+        self._size = 0
+        self._cond = threading.Condition()
+        self.accepted = 0
+        self.dropped = 0
+
+    def __len__(self):
+        return self._size
+
+    def put(self, batch, timeout=None):
+        """Queue a PING_DTYPE batch; returns False if it was dropped on timeout"""
+        if len(batch) == 0:
+            return True
+        if len(batch) > self.capacity:
+            raise ValueError(f"batch of {len(batch)} pings exceeds queue capacity {self.capacity}")
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._size + len(batch) <= self.capacity, timeout):
+                self.dropped += len(batch)
+                return False
+            self._batches.append(batch)
+            self._size += len(batch)
+            self.accepted += len(batch)
+        return True
+
+    def drain(self):
+        """Everything queued, as one array, freeing room for producers"""
+        with self._cond:
+            batches = list(self._batches)
+            self._batches.clear()
+            self._size = 0
+            self._cond.notify_all()
+        if not batches:
+            return np.empty(0, dtype=PING_DTYPE)
+        return np.concatenate(batches)
+
+    def stats(self):
+        return {"queued": self._size, "accepted": self.accepted, "dropped": self.dropped}
+
+
+class _Source:
+    """Background producer thread feeding a PingQueue"""
+
+    name = "gps"
+
+    def __init__(self, queue):
+        self.queue = queue
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self):
+        raise NotImplementedError
+
+
+class FileSource(_Source):
+    """Replays a "time,emergency,lat,lon" file, optionally paced by its timestamps"""
+
+    name = "gps-file"
+
+    def __init__(self, queue, path, batch_size=1024, realtime=False):
+        super().__init__(queue)
+        self.path = path
+        self.batch_size = batch_size
+        self.realtime = realtime
+
+    def _run(self):
+        started = time.monotonic()
+        first = None
+        with open(self.path) as f:
+            while not self._stop.is_set():
+                lines = [line for _, line in zip(range(self.batch_size), f)]
+                if not lines:
+                    return
+                batch = parse_lines(lines)
+                if self.realtime and len(batch):
+                    first = batch["time"][0] if first is None else first
+                    self._stop.wait(max(0.0, batch["time"][-1] - first - (time.monotonic() - started)))
+                self.queue.put(batch)
+
+
+class SocketSource(_Source):
+    """Receives UDP datagrams of newline-separated "time,emergency,lat,lon" pings"""
+
+    name = "gps-udp"
+
+    def __init__(self, queue, host="127.0.0.1", port=8766):
+        super().__init__(queue)
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.bind((host, port))
+        self.sock.settimeout(0.5)
+
+    def _run(self):
+        try:
+            while not self._stop.is_set():
+                try:
+                    data = self.sock.recv(65536)
+                except socket.timeout:
+                    continue
+                # A full queue drops datagrams rather than stalling the socket
+                self.queue.put(parse_lines(data.decode(errors="replace").splitlines()), timeout=0)
+        finally:
+            self.sock.close()
+
+
+class SimulatedSource(_Source):
+    """Stand-in fleet: noisy fixes moving along each active emergency's route
+
+    Each ambulance drives its current leg in the time the simulation
+    budgeted when the leg began, interpolated along the leg, so fixes
+    land where the scheduled arrivals would have put it and the route
+    takes its planned time; rate is pings per second per emergency.
+    """
+
+    name = "gps-sim"
+
+    def __init__(self, queue, service, rate=10.0, noise_m=15.0, seed=None):
+        super().__init__(queue)
+        self.service = service
+        self.rate = rate
+        self.noise_m = noise_m
+        self.rng = np.random.default_rng(seed)
+
+    def _run(self):
+        interval = 1.0 / self.rate
+        while not self._stop.wait(interval):
+            batch = self.fixes(self.service.snapshot(), time.time())
+            if len(batch):
+                self.queue.put(batch)
+
+    def fixes(self, snapshot, now):
+        store = snapshot.store
+        rows = []
+        for eid, emergency in snapshot.emergencies.items():
+            route_idx, i = emergency["route_idx"], emergency["position"]
+            if i + 1 >= len(route_idx):
+                continue
+            leg_seconds = emergency["leg_seconds"]
+            t = min(1.0, (snapshot.clock - emergency["leg_start"]) / leg_seconds) if leg_seconds > 0 else 1.0
+            a, b = route_idx[i], route_idx[i + 1]
+            lat = store.lat[a] + t * (store.lat[b] - store.lat[a])
+            lon = store.lon[a] + t * (store.lon[b] - store.lon[a])
+            rows.append((now, eid, lat, lon))
+        batch = np.array(rows, dtype=PING_DTYPE)
+        if len(batch):
+            noise = self.rng.normal(0, self.noise_m, (2, len(batch)))
+            batch["lat"] += np.degrees(noise[0] / EARTH_RADIUS_M)
+            batch["lon"] += np.degrees(noise[1] / (EARTH_RADIUS_M * np.cos(np.radians(batch["lat"]))))
+        return batch
@@ -0,0 +1,208 @@
+import numpy as np
+
+from network import GREEN
+
+HISTORY_DTYPE = np.dtype([
+    ("time", np.float64),
+    ("total_vehicles", np.int64),
+    ("green_lights", np.int32),
+    ("avg_congestion", np.float32),
+    ("emergency_active", np.bool_),
+    ("emergency_id", np.int64),
+])
+
+
+class TrafficHistory:
+    """Fixed-capacity ring buffer of network-wide metrics
+
+    Storage is preallocated at twice the capacity and every record is
+    written to both halves, so any window of up to capacity records is a
+    contiguous slice. Appends are O(1) and windows are zero-copy views.
+    """
+
+    def __init__(self, capacity):
+        self.capacity = int(capacity)
+        self._data = np.zeros(2 * self.capacity, dtype=HISTORY_DTYPE)
+        self._head = 0    # next write position in [0, capacity)
+        self._count = 0
+
+    @classmethod
+    def for_retention(cls, retention_seconds, sample_seconds):
+        """Buffer sized to keep retention_seconds of samples taken every sample_seconds"""
+        return cls(max(1, int(np.ceil(retention_seconds / sample_seconds))))
+
+    def __len__(self):
+        return self._count
+
+    def append(self, time, total_vehicles, green_lights, avg_congestion,
+               emergency_active, emergency_id):
+        record = (time, total_vehicles, green_lights, avg_congestion,
+                  emergency_active, emergency_id)
+        head = self._head
+        self._data[head] = record
+        self._data[head + self.capacity] = record
+        self._head = (head + 1) % self.capacity
+        self._count = min(self._count + 1, self.capacity)
+
+    def window(self, n=None):
+        """The last n records (all retained by default), oldest first, as a view"""
+        count = self._count
+        n = count if n is None else min(n, count)
+        end = self._head + self.capacity if count == self.capacity else self._head
+        return self._data[end - n:end]
+
+    def since(self, time):
+        """Records with a timestamp at or after time, as a view"""
+        records = self.window()
+        return records[np.searchsorted(records["time"], time):]
+
+    def latest(self):
+        return self.window(1)[0] if self._count else None
+
+
+# Rollup levels as (bucket seconds, buckets kept): an hour of 10 s buckets,
+# a day of 1 min buckets and a week of 1 h buckets
+ROLLUP_LEVELS = ((10, 360), (60, 1440), (3600, 168))
+# Intersections with history on large networks. Each tracked intersection
+# keeps 8 bytes per bucket, about 15 KiB across ROLLUP_LEVELS, so this
+# caps rollups near 60 MiB whatever the network size
+MAX_HISTORY_NODES = 4000
+_VEHICLES_MAX = np.iinfo(np.uint16).max
+
+
+def history_nodes(n, anchors=(), limit=MAX_HISTORY_NODES):
+    """Intersections to keep history for: all of them, or the anchors plus an even sample up to limit"""
+    if n <= limit:
+        return np.arange(n)
+    anchors = np.unique(np.asarray(anchors, dtype=np.intp))[:limit]
+    sample = np.linspace(0, n - 1, limit - len(anchors)).astype(np.intp)
+    return np.union1d(anchors, sample)
+
+
+class RollupLevel:
+    """Ring of closed min/max/mean buckets plus the accumulator of the open bucket
+
+    Closed buckets are stored compactly, 8 bytes per intersection: uint16
+    vehicle bounds and float16 means and green shares.
+    """
+
+    def __init__(self, width, capacity, n):
+        self.width = width
+        self.capacity = capacity
+        self.time = np.zeros(capacity)
+        self.min = np.zeros((capacity, n), dtype=np.uint16)
+        self.max = np.zeros((capacity, n), dtype=np.uint16)
+        self.mean = np.zeros((capacity, n), dtype=np.float16)
+        self.green = np.zeros((capacity, n), dtype=np.float16)
+        self.head = 0
+        self.count = 0
+        self.bucket = None
+        self._acc = None
+
+    def add(self, time, vmin, vmax, vsum, samples, green):
+        """Fold a sample or a finer bucket in; returns the bucket it closed, if any"""
+        bucket = int(time // self.width)
+        closed = None
+        if self.bucket is not None and bucket != self.bucket:
+            closed = self._close()
+        if self.bucket is None:
+            self.bucket = bucket
+            self._acc = [vmin.copy(), vmax.copy(), vsum.copy(), samples, green.copy()]
+        else:
+            acc = self._acc
+            np.minimum(acc[0], vmin, out=acc[0])
+            np.maximum(acc[1], vmax, out=acc[1])
+            acc[2] += vsum
+            acc[3] += samples
+            acc[4] += green
+        return closed
+
+    def _close(self):
+        vmin, vmax, vsum, samples, green = self._acc
+        start = self.bucket * self.width
+        row = self.head
+        self.time[row] = start
+        self.min[row] = np.clip(vmin, 0, _VEHICLES_MAX)
+        self.max[row] = np.clip(vmax, 0, _VEHICLES_MAX)
+        self.mean[row] = vsum / samples
+        self.green[row] = green / samples
+        self.head = (row + 1) % self.capacity
+        self.count = min(self.count + 1, self.capacity)
+        self.bucket = None
+        self._acc = None
+        return start, vmin, vmax, vsum, samples, green
+
+    def last(self, k, node=None):
+        """The last k closed buckets plus the open one, oldest first"""
+        k = min(k, self.count)
+        rows = (self.head - k + np.arange(k)) % self.capacity
+        cols = slice(None) if node is None else node
+        out = {
+            "time": self.time[rows],
+            "min": self.min[rows, cols].astype(np.int32), "max": self.max[rows, cols].astype(np.int32),
+            "mean": self.mean[rows, cols].astype(np.float32), "green": self.green[rows, cols].astype(np.float32),
+        }
+        if self._acc is not None:
+            vmin, vmax, vsum, samples, green = self._acc
+            partial = {"time": self.bucket * self.width, "min": vmin[cols], "max": vmax[cols],
+                       "mean": vsum[cols] / samples, "green": green[cols] / samples}
+            out = {key: np.concatenate([out[key], np.asarray(partial[key])[None]]) for key in out}
+        return out
+
+
+class IntersectionHistory:
+    """Per-intersection vehicle and signal history with multi-resolution rollups
+
+    Samples feed the finest rollup level. Each level hands its closed
+    buckets to the next coarser one, so recording costs one vectorized
+    fold per level only when a bucket closes. Queries read from the
+    finest level that covers the window in a bounded number of points.
+    Only the intersections in nodes are kept (all by default); memory is
+    about 8 bytes x total buckets x tracked intersections.
+    """
+
+    def __init__(self, n, levels=ROLLUP_LEVELS, nodes=None):
+        self.n = n
+        self.nodes = np.arange(n) if nodes is None else np.unique(np.asarray(nodes, dtype=np.intp))
+        self.levels = [RollupLevel(width, capacity, len(self.nodes)) for width, capacity in levels]
+
+    def column(self, node):
+        """Column of an intersection in the rollups, or None when it is not tracked"""
+        k = int(np.searchsorted(self.nodes, node))
+        return k if k < len(self.nodes) and self.nodes[k] == node else None
+
+    def record(self, time, vehicles, status):
+        vehicles = np.asarray(vehicles, dtype=np.int32)
+        status = np.asarray(status)
+        if len(self.nodes) != self.n:
+            vehicles, status = vehicles[self.nodes], status[self.nodes]
+        item = (time, vehicles, vehicles, vehicles.astype(np.float64), 1,
+                (status == GREEN).astype(np.float64))
+        for level in self.levels:
+            item = level.add(*item)
+            if item is None:
+                break
+
+    def level_for(self, window_seconds, max_points=400):
+        """Finest rollup level that covers the window within max_points"""
+        for level in self.levels:
+            if level.width * level.capacity >= window_seconds and window_seconds / level.width <= max_points:
+                return level
+        return self.levels[-1]
+
+    def series(self, window_seconds, node=None, max_points=400):
+        """Min/max/mean vehicles and green share over the window
+
+        node selects one intersection and gives None when it is not
+        tracked; by default the result has one column per tracked
+        intersection, in nodes order.
+        """
+        if node is not None:
+            node = self.column(node)
+            if node is None:
+                return None
+        level = self.level_for(window_seconds, max_points)
+        k = int(np.ceil(window_seconds / level.width))
+        out = level.last(k, node)
+        out["resolution"] = level.width
+        return out
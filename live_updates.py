@@ -0,0 +1,176 @@
+import json
+import threading
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+
+from network import STATUS_NAMES
+
+# Intersection fields carried in change sets
+TRACKED_FIELDS = ("status", "vehicles", "congestion_level")
+
+# Change sets kept for sessions that fall behind; older readers get a full refresh
+FEED_CAPACITY = 256
+
+
+def diff_snapshots(previous, current):
+    """Change set between two snapshots: only intersections whose fields moved"""
+    changed = np.zeros(len(current.store), dtype=bool)
+    for field in TRACKED_FIELDS:
+        changed |= getattr(previous.store, field) != getattr(current.store, field)
+    nodes = np.flatnonzero(changed)
+    emergencies_changed = (
+        previous.emergencies.keys() != current.emergencies.keys()
+        or any(previous.emergencies[eid]["position"] != e["position"]
+               for eid, e in current.emergencies.items())
+    )
+    return {
+        "version": current.version,
+        "clock": current.clock,
+        "nodes": nodes,
+        "fields": {field: getattr(current.store, field)[nodes] for field in TRACKED_FIELDS},
+        "emergencies_changed": emergencies_changed,
+    }
+
+
+def is_empty(change):
+    return len(change["nodes"]) == 0 and not change["emergencies_changed"]
+
+
+def to_json(change, names):
+    """Serialize a change set as a patch keyed by intersection name"""
+    patch = {}
+    for k, i in enumerate(change["nodes"].tolist()):
+        patch[names[i]] = {
+            "status": STATUS_NAMES[change["fields"]["status"][k]],
+            "vehicles": int(change["fields"]["vehicles"][k]),
+            "congestion_level": round(float(change["fields"]["congestion_level"][k]), 4),
+        }
+    return json.dumps({
+        "version": change["version"], "clock": change["clock"],
+        "intersections": patch, "emergencies_changed": change["emergencies_changed"],
+    })
+
+
+class ChangeFeed:
+    """Bounded history of change sets that readers poll by version"""
+
+    def __init__(self, capacity=FEED_CAPACITY):
+        self._changes = deque(maxlen=capacity)
+        self._cond = threading.Condition()
+        self._version = 0
+
+    def record(self, change):
+        with self._cond:
+            self._changes.append(change)
+            self._version = change["version"]
+            self._cond.notify_all()
+
+    def latest_version(self):
+        return self._version
+
+    def since(self, version):
+        """Merged change set after version, or None when it is too old to patch
+
+        A version newer than the latest one comes from before a restart, so
+        it also gets None and the reader starts over.
+        """
+        with self._cond:
+            oldest = self._changes[0]["version"] if self._changes else self._version + 1
+            if version < oldest - 1 or version > self._version:
+                return None
+            changes = [c for c in self._changes if c["version"] > version]
+        return merge(changes, version)
+
+    def wait(self, version, timeout=None):
+        """Block until something newer than version is recorded, or return at once for a stale future version"""
+        with self._cond:
+            self._cond.wait_for(lambda: self.latest_version() != version, timeout)
+        return self.since(version)
+
+
+def merge(changes, version=0):
+    """Fold consecutive change sets into one, keeping the newest field values"""
+    if not changes:
+        return {"version": version, "clock": None, "nodes": np.empty(0, dtype=np.intp),
+                "fields": {field: np.empty(0) for field in TRACKED_FIELDS},
+                "emergencies_changed": False}
+    if len(changes) == 1:
+        return changes[0]
+    nodes = np.concatenate([c["nodes"] for c in changes])
+    fields = {field: np.concatenate([c["fields"][field] for c in changes]) for field in TRACKED_FIELDS}
+    # Keep the last occurrence of each node
+    _, last = np.unique(nodes[::-1], return_index=True)
+    keep = len(nodes) - 1 - last
+    return {
+        "version": changes[-1]["version"],
+        "clock": changes[-1]["clock"],
+        "nodes": nodes[keep],
+        "fields": {field: values[keep] for field, values in fields.items()},
+        "emergencies_changed": any(c["emergencies_changed"] for c in changes),
+    }
+
+
+class EventStreamServer:
+    """Local server-sent-events endpoint streaming change sets as JSON patches
+
+    GET /events?since=<version> keeps the connection open and writes one
+    ``data:`` line per non-empty change set.
+    """
+
+    def __init__(self, service, host="127.0.0.1", port=8765):
+        self.service = service
+        handler = self._handler()
+        self.httpd = ThreadingHTTPServer((host, port), handler)
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name="sse", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def _handler(self):
+        service = self.service
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                url = urlparse(self.path)
+                if url.path != "/events":
+                    self.send_error(404)
+                    return
+                try:
+                    version = int(parse_qs(url.query).get("since", ["0"])[0])
+                except ValueError:
+                    self.send_error(400, "since must be an integer version")
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Cache-Control", "no-cache")
+                self.end_headers()
+                names = service.snapshot().store.names
+                try:
+                    while True:
+                        change = service.changes.wait(version, timeout=15)
+                        if change is None:
+                            self.wfile.write(b"event: reset\ndata: {}\n\n")
+                            version = service.changes.latest_version()
+                        elif change["version"] > version:
+                            version = change["version"]
+                            if not is_empty(change):
+                                self.wfile.write(f"data: {to_json(change, names)}\n\n".encode())
+                        else:
+                            self.wfile.write(b": keep-alive\n\n")
+                        self.wfile.flush()
+                except (BrokenPipeError, ConnectionResetError):
+                    pass
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
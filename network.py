@@ -0,0 +1,197 @@
+import numpy as np
+
+# Signal states are stored as small integer codes
+RED, YELLOW, GREEN = 0, 1, 2
+STATUS_NAMES = ("red", "yellow", "green")
+STATUS_CODES = {name: code for code, name in enumerate(STATUS_NAMES)}
+STATUS_COLORS = np.array(["#ff4757", "#ffa502", "#2ed573"])
+
+PRIORITY_NAMES = ("low", "medium", "high")
+PRIORITY_CODES = {name: code for code, name in enumerate(PRIORITY_NAMES)}
+
+# Bounds for seeded vehicle counts
+MIN_VEHICLES = 3
+MAX_VEHICLES = 65
+
+# Delhi intersections with enhanced data
+DELHI_INTERSECTIONS = {
+    "Connaught Place": {
+        "lat": 28.6315, "lon": 77.2167, "status": "red", "vehicles": 45,
+        "normal_cycle": "red", "zone": "Central", "priority": "high",
+        "ambulance_time": 0, "congestion_level": 0.8
+    },
+    "India Gate": {
+        "lat": 28.6129, "lon": 77.2295, "status": "green", "vehicles": 32,
+        "normal_cycle": "yellow", "zone": "Central", "priority": "medium",
+        "ambulance_time": 0, "congestion_level": 0.6
+    },
+    "Red Fort": {
+        "lat": 28.6562, "lon": 77.2410, "status": "yellow", "vehicles": 28,
+        "normal_cycle": "green", "zone": "Old Delhi", "priority": "medium",
+        "ambulance_time": 0, "congestion_level": 0.5
+    },
+    "Karol Bagh": {
+        "lat": 28.6519, "lon": 77.1906, "status": "green", "vehicles": 38,
+        "normal_cycle": "red", "zone": "West", "priority": "high",
+        "ambulance_time": 0, "congestion_level": 0.7
+    },
+    "Chandni Chowk": {
+        "lat": 28.6506, "lon": 77.2334, "status": "red", "vehicles": 52,
+        "normal_cycle": "yellow", "zone": "Old Delhi", "priority": "high",
+        "ambulance_time": 0, "congestion_level": 0.9
+    },
+    "Rajouri Garden": {
+        "lat": 28.6470, "lon": 77.1203, "status": "yellow", "vehicles": 25,
+        "normal_cycle": "green", "zone": "West", "priority": "low",
+        "ambulance_time": 0, "congestion_level": 0.4
+    },
+    "Lajpat Nagar": {
+        "lat": 28.5677, "lon": 77.2428, "status": "green", "vehicles": 33,
+        "normal_cycle": "red", "zone": "South", "priority": "medium",
+        "ambulance_time": 0, "congestion_level": 0.6
+    },
+    "Nehru Place": {
+        "lat": 28.5494, "lon": 77.2524, "status": "red", "vehicles": 41,
+        "normal_cycle": "yellow", "zone": "South", "priority": "high",
+        "ambulance_time": 0, "congestion_level": 0.75
+    }
+}
+
+# Enhanced ambulance routes; travel times come from EtaService
+AMBULANCE_ROUTES = {
+    "🏥 AIIMS → Red Fort (Critical)": {
+        "route": ["Connaught Place", "India Gate", "Red Fort"],
+        "hospital": "AIIMS", "destination": "Red Fort Hospital",
+        "priority": "Critical"
+    },
+    "🚑 Safdarjung → Chandni Chowk": {
+        "route": ["Connaught Place", "Karol Bagh", "Chandni Chowk"],
+        "hospital": "Safdarjung", "destination": "LNJP Hospital",
+        "priority": "High"
+    },
+    "🏥 Max Hospital → LNJP (Emergency)": {
+        "route": ["Rajouri Garden", "Karol Bagh", "Connaught Place", "Chandni Chowk"],
+        "hospital": "Max Hospital", "destination": "LNJP Hospital",
+        "priority": "Emergency"
+    },
+    "🚁 Apollo → Fortis (Trauma)": {
+        "route": ["Lajpat Nagar", "Nehru Place", "India Gate", "Connaught Place"],
+        "hospital": "Apollo", "destination": "Fortis Hospital",
+        "priority": "Trauma"
+    }
+}
+
+# Hospital locations used as corridor origins and destinations
+HOSPITALS = {
+    "AIIMS": {"lat": 28.5672, "lon": 77.2100},
+    "Safdarjung": {"lat": 28.5685, "lon": 77.2066},
+    "Max Hospital": {"lat": 28.6490, "lon": 77.1180},
+    "Apollo": {"lat": 28.5410, "lon": 77.2830},
+    "Red Fort Hospital": {"lat": 28.6580, "lon": 77.2420},
+    "LNJP Hospital": {"lat": 28.6394, "lon": 77.2393},
+    "Fortis Hospital": {"lat": 28.6290, "lon": 77.2140},
+}
+
+
+class IntersectionStore:
+    """Columnar intersection state with one NumPy array per field"""
+
+    def __init__(self, names, lat, lon, status, normal_cycle, vehicles,
+                 congestion_level, zone, zone_names, priority, ambulance_time=None):
+        self.names = list(names)
+        self.index = {name: i for i, name in enumerate(self.names)}
+        self.lat = np.asarray(lat, dtype=np.float64)
+        self.lon = np.asarray(lon, dtype=np.float64)
+        self.status = np.asarray(status, dtype=np.int8)
+        self.normal_cycle = np.asarray(normal_cycle, dtype=np.int8)
+        self.vehicles = np.asarray(vehicles, dtype=np.int32)
+        self.congestion_level = np.asarray(congestion_level, dtype=np.float32)
+        self.zone = np.asarray(zone, dtype=np.int16)
+        self.zone_names = list(zone_names)
+        self.priority = np.asarray(priority, dtype=np.int8)
+        if ambulance_time is None:
+            ambulance_time = np.zeros(len(self.names))
+        self.ambulance_time = np.asarray(ambulance_time, dtype=np.float64)
+
+    @classmethod
+    def from_dict(cls, intersections):
+        """Build a store from the DELHI_INTERSECTIONS dict-of-dicts layout"""
+        names = list(intersections)
+        rows = [intersections[name] for name in names]
+        zone_names = list(dict.fromkeys(row["zone"] for row in rows))
+        zone_codes = {zone: code for code, zone in enumerate(zone_names)}
+        return cls(
+            names,
+            lat=[row["lat"] for row in rows],
+            lon=[row["lon"] for row in rows],
+            status=[STATUS_CODES[row["status"]] for row in rows],
+            normal_cycle=[STATUS_CODES[row["normal_cycle"]] for row in rows],
+            vehicles=[row["vehicles"] for row in rows],
+            congestion_level=[row["congestion_level"] for row in rows],
+            zone=[zone_codes[row["zone"]] for row in rows],
+            zone_names=zone_names,
+            priority=[PRIORITY_CODES[row["priority"]] for row in rows],
+            ambulance_time=[row["ambulance_time"] for row in rows],
+        )
+
+    def frozen_copy(self):
+        """Read-only copy of the mutable fields; static fields are shared"""
+        copy = object.__new__(IntersectionStore)
+        copy.__dict__.update(self.__dict__)
+        for field in ("status", "vehicles", "ambulance_time", "congestion_level"):
+            array = getattr(self, field).copy()
+            array.setflags(write=False)
+            setattr(copy, field, array)
+        return copy
+
+    def __len__(self):
+        return len(self.names)
+
+    def indices(self, names):
+        """Map intersection names to an index array"""
+        return np.fromiter((self.index[name] for name in names), dtype=np.intp, count=len(names))
+
+    def record(self, i):
+        """Return intersection i in the original dict layout, for display"""
+        return {
+            "lat": float(self.lat[i]), "lon": float(self.lon[i]),
+            "status": STATUS_NAMES[self.status[i]],
+            "vehicles": int(self.vehicles[i]),
+            "normal_cycle": STATUS_NAMES[self.normal_cycle[i]],
+            "zone": self.zone_names[self.zone[i]],
+            "priority": PRIORITY_NAMES[self.priority[i]],
+            "ambulance_time": float(self.ambulance_time[i]),
+            "congestion_level": float(self.congestion_level[i]),
+        }
+
+    def items(self):
+        for i, name in enumerate(self.names):
+            yield name, self.record(i)
+
+    def apply_corridors(self, on_route, elapsed_time):
+        """Hold corridor intersections green and everything else red"""
+        self.status[:] = np.where(on_route, GREEN, RED)
+        self.ambulance_time[on_route] = np.broadcast_to(elapsed_time, on_route.shape)[on_route]
+
+    def apply_wave(self, preempt, elapsed_time):
+        """Hold the green-wave window green and leave every other signal on its normal cycle"""
+        self.status[:] = np.where(preempt, GREEN, self.normal_cycle)
+        self.ambulance_time[preempt] = elapsed_time[preempt]
+
+    def restore(self):
+        """Return every signal to its normal cycle"""
+        self.status[:] = self.normal_cycle
+        self.ambulance_time[:] = 0
+
+    def total_vehicles(self):
+        return int(self.vehicles.sum())
+
+    def green_count(self):
+        return int(np.count_nonzero(self.status == GREEN))
+
+    def mean_congestion(self):
+        return float(self.congestion_level.mean()) if len(self.names) else 0.0
+
+    def metrics(self):
+        """Network-wide aggregates shown in the metrics column"""
+        return self.total_vehicles(), self.green_count(), self.mean_congestion()
@@ -0,0 +1,330 @@
+import json
+
+import numpy as np
+import plotly.graph_objects as go
+
+from network import STATUS_COLORS, STATUS_NAMES, PRIORITY_NAMES, GREEN
+
+# Hand-placed layout for the Delhi network; other networks are projected from lat/lon
+BASE_POSITIONS = {
+    "Connaught Place": (0, 0), "India Gate": (1.2, -0.8),
+    "Red Fort": (0.6, 1.5), "Karol Bagh": (-1.3, 0.7),
+    "Chandni Chowk": (0.2, 2), "Rajouri Garden": (-2, 0.2),
+    "Lajpat Nagar": (0.8, -1.5), "Nehru Place": (1.5, -2)
+}
+
+# Trace order in the cached figure
+ROUTE_TRACE, PROGRESS_TRACE, NODE_TRACE, TRAIL_TRACE, ZONE_TRACE = 0, 1, 2, 3, 4
+
+# Discrete red/yellow/green scale for integer status codes
+STATUS_COLORSCALE = [[0, STATUS_COLORS[0]], [1 / 3, STATUS_COLORS[0]], [1 / 3, STATUS_COLORS[1]],
+                     [2 / 3, STATUS_COLORS[1]], [2 / 3, STATUS_COLORS[2]], [1, STATUS_COLORS[2]]]
+
+# Above this many intersections the map switches to WebGL and zone clustering
+LARGE_NETWORK_NODES = 500
+# Most individual signals drawn at once in "signals" detail; the rest are decimated
+MAX_DETAIL_POINTS = 20000
+
+
+def corridor_masks(store, emergency):
+    """On-route and ambulance-here masks for one emergency"""
+    on_route = np.zeros(len(store), dtype=bool)
+    ambulance_here = np.zeros(len(store), dtype=bool)
+    if emergency is not None:
+        on_route[emergency["route_idx"]] = True
+        ambulance_here[emergency["route_idx"][emergency["position"]]] = True
+    return on_route, ambulance_here
+
+
+def layout_positions(store, extent=2.5):
+    """Plot coordinates: the hand-placed layout if known, else scaled lat/lon"""
+    if all(name in BASE_POSITIONS for name in store.names):
+        xy = np.array([BASE_POSITIONS[name] for name in store.names], dtype=np.float64)
+        return xy[:, 0], xy[:, 1]
+    x, y = store.lon.copy(), store.lat.copy()
+    for axis in (x, y):
+        lo, hi = axis.min(), axis.max()
+        axis -= (lo + hi) / 2
+        if hi > lo:
+            axis *= 2 * extent / (hi - lo)
+    return x, y
+
+
+def marker_sizes(store):
+    """Dynamic sizing based on vehicles and congestion"""
+    base_size = 25
+    congestion_multiplier = 1 + (store.congestion_level * 0.5)
+    vehicle_multiplier = 1 + (store.vehicles / 100)
+    return np.clip(base_size * congestion_multiplier * vehicle_multiplier, 20, 60)
+
+
+def zone_summary(store, x, y):
+    """Per-zone centroid, vehicle total, green count and mean congestion"""
+    zones = len(store.zone_names)
+    counts = np.maximum(np.bincount(store.zone, minlength=zones), 1)
+    return {
+        "x": np.bincount(store.zone, x, zones) / counts,
+        "y": np.bincount(store.zone, y, zones) / counts,
+        "vehicles": np.bincount(store.zone, store.vehicles, zones).astype(np.int64),
+        "green": np.bincount(store.zone, store.status == GREEN, zones).astype(np.int64),
+        "congestion": np.bincount(store.zone, store.congestion_level, zones) / counts,
+        "signals": np.bincount(store.zone, minlength=zones),
+    }
+
+
+def hover_text(name, store, i, on_route, ambulance_here):
+    status = STATUS_NAMES[store.status[i]].upper()
+    vehicles = store.vehicles[i]
+    zone = store.zone_names[store.zone[i]]
+    if ambulance_here:
+        return f"🚑 AMBULANCE ACTIVE<br><b>{name}</b><br>Signal: {status}<br>Vehicles: {vehicles}<br>Zone: {zone}<br>Priority: {PRIORITY_NAMES[store.priority[i]].upper()}"
+    if on_route:
+        return f"🚨 EMERGENCY CORRIDOR<br><b>{name}</b><br>Signal: {status}<br>Vehicles: {vehicles}<br>Zone: {zone}"
+    return f"<b>{name}</b><br>Signal: {status}<br>Vehicles: {vehicles}<br>Zone: {zone}<br>Congestion: {int(store.congestion_level[i]*100)}%"
+
+
+class NetworkMap:
+    """Network figure built once and patched in place on every tick
+
+    The grid, layout, node positions and labels are static. update() only
+    touches marker colour, size and symbol, hover text for intersections
+    whose state changed, and the route traces, and returns the minimal
+    diff it applied. Patching saves rebuilding the figure server side;
+    Streamlit's plotly_chart still sends the whole figure each run, so
+    only a client that keeps the figure can apply the diff instead.
+
+    Large networks render nodes with WebGL and add one marker per zone.
+    In "zones" detail only on-route signals are drawn individually; in
+    "signals" detail a decimated sample of all signals is drawn as well.
+    """
+
+    def __init__(self, store, detail=None):
+        self.x, self.y = layout_positions(store)
+        self.names = store.names
+        self.large = len(store) > LARGE_NETWORK_NODES
+        self.detail = detail or ("zones" if self.large else "signals")
+        if self.detail == "zones":
+            self._base_visible = np.empty(0, dtype=np.intp)
+        else:
+            stride = max(1, -(-len(store) // MAX_DETAIL_POINTS))
+            self._base_visible = np.arange(0, len(store), stride)
+        self._visible = None
+        self._route_state = None
+        self.figure = self._base_figure(store)
+
+    def _reset_node_cache(self, visible):
+        self._visible = visible
+        self._colors = np.full(len(visible), "", dtype=object)
+        self._sizes = np.full(len(visible), np.nan)
+        self._symbols = np.full(len(visible), "", dtype=object)
+        self._vehicles = np.full(len(visible), -1)
+        self._congestion = np.full(len(visible), np.nan, dtype=np.float32)
+        self._hover = [""] * len(visible)
+
+    def _base_figure(self, store):
+        fig = go.Figure()
+
+        # Background grid
+        for i in range(-3, 4):
+            fig.add_shape(
+                type="line", x0=i, y0=-3, x1=i, y1=3,
+                line=dict(color="rgba(0,212,255,0.12)", width=1)
+            )
+            fig.add_shape(
+                type="line", x0=-3, y0=i, x1=3, y1=i,
+                line=dict(color="rgba(0,212,255,0.12)", width=1)
+            )
+
+        # Route, progress, nodes and trail traces always exist so indices stay stable
+        fig.add_trace(go.Scatter(
+            x=[], y=[], mode='lines',
+            line=dict(width=8, color='rgba(255,107,53,0.3)'),
+            showlegend=False, hoverinfo='skip'
+        ))
+        fig.add_trace(go.Scatter(
+            x=[], y=[], mode='lines',
+            line=dict(width=12, color='#ff6b35'),
+            showlegend=False, hoverinfo='skip'
+        ))
+        if self.large:
+            fig.add_trace(go.Scattergl(
+                x=[], y=[], mode='markers',
+                marker=dict(opacity=0.9, cmin=0, cmax=2, colorscale=STATUS_COLORSCALE),
+                hovertemplate='%{hovertext}<extra></extra>',
+                showlegend=False
+            ))
+        else:
+            fig.add_trace(go.Scatter(
+                x=[], y=[],
+                mode='markers+text',
+                marker=dict(opacity=0.9, line=dict(width=3, color='white')),
+                textposition="bottom center",
+                textfont=dict(size=9, color='white', family='Inter'),
+                hovertemplate='%{hovertext}<extra></extra>',
+                showlegend=False
+            ))
+        fig.add_trace(go.Scatter(
+            x=[], y=[], mode='markers',
+            marker=dict(size=15, color='cyan', symbol='circle', opacity=0.6),
+            showlegend=False, hoverinfo='skip'
+        ))
+        fig.add_trace(go.Scatter(
+            x=[], y=[], mode='markers+text',
+            marker=dict(color=[], colorscale=[[0, '#2ed573'], [0.5, '#ffa502'], [1, '#ff4757']],
+                        cmin=0, cmax=1, opacity=0.35, line=dict(width=2, color='white')),
+            textposition="middle center",
+            textfont=dict(size=11, color='white', family='Inter'),
+            hovertemplate='%{hovertext}<extra></extra>',
+            showlegend=False
+        ))
+
+        # Layout with dark theme
+        fig.update_layout(
+            title=dict(
+                text="🌐 NEXUS Traffic Network - Real-time Monitoring",
+                font=dict(size=20, color='white', family='Orbitron'),
+                x=0.5
+            ),
+            xaxis=dict(showgrid=False, showticklabels=False, range=[-3, 3], color='white'),
+            yaxis=dict(showgrid=False, showticklabels=False, range=[-3, 3], color='white'),
+            height=600,
+            paper_bgcolor='rgba(0,0,0,0)',
+            plot_bgcolor='rgba(26,26,46,0.3)',
+            font=dict(color='white', family='Inter'),
+            uirevision="network",
+        )
+        return fig
+
+    def _visible_nodes(self, emergency):
+        if not self.large:
+            return np.arange(len(self.x))
+        if emergency is None:
+            return self._base_visible
+        return np.union1d(self._base_visible, emergency["route_idx"])
+
+    def update(self, store, emergency, progress=0.0):
+        """Patch the cached figure to match the store; returns the applied diff"""
+        diff = {}
+        nodes = self.figure.data[NODE_TRACE]
+        visible = self._visible_nodes(emergency)
+        if self._visible is None or not np.array_equal(visible, self._visible):
+            self._reset_node_cache(visible)
+            with self.figure.batch_update():
+                nodes.x, nodes.y = self.x[visible], self.y[visible]
+                if not self.large:
+                    nodes.text = [self.names[i].replace(' ', '<br>') for i in visible]
+            diff[NODE_TRACE] = {"x": self.x[visible].tolist(), "y": self.y[visible].tolist()}
+
+        on_route, ambulance_here = corridor_masks(store, emergency)
+        on_route, ambulance_here = on_route[visible], ambulance_here[visible]
+        if self.large:
+            node_diff = self._update_gl_nodes(store, visible, on_route)
+        else:
+            node_diff = self._update_detailed_nodes(store, visible, on_route, ambulance_here)
+        if node_diff:
+            diff.setdefault(NODE_TRACE, {}).update(node_diff)
+
+        if self.large:
+            diff.update(self._update_zones(store))
+        diff.update(self._update_route(emergency, progress))
+        return diff
+
+    def _update_detailed_nodes(self, store, visible, on_route, ambulance_here):
+        colors = STATUS_COLORS[store.status[visible]].astype(object)
+        sizes = marker_sizes(store)[visible]
+        symbols = np.where(ambulance_here, "star", np.where(on_route, "diamond", "circle")).astype(object)
+        vehicles = store.vehicles[visible]
+        congestion = store.congestion_level[visible]
+
+        changed = ((colors != self._colors) | (sizes != self._sizes) | (symbols != self._symbols)
+                   | (vehicles != self._vehicles) | (congestion != self._congestion))
+        idx = np.flatnonzero(changed)
+        if len(idx) == 0:
+            return {}
+        for k in idx.tolist():
+            self._hover[k] = hover_text(self.names[visible[k]], store, visible[k], on_route[k], ambulance_here[k])
+        self._colors, self._sizes, self._symbols = colors, sizes, symbols
+        self._vehicles, self._congestion = vehicles, congestion
+        nodes = self.figure.data[NODE_TRACE]
+        with self.figure.batch_update():
+            nodes.marker.color = colors
+            nodes.marker.size = sizes
+            nodes.marker.symbol = symbols
+            nodes.hovertext = self._hover
+        return {
+            "idx": visible[idx].tolist(),
+            "marker.color": colors[idx].tolist(),
+            "marker.size": sizes[idx].round(2).tolist(),
+            "marker.symbol": symbols[idx].tolist(),
+            "hovertext": [self._hover[k] for k in idx.tolist()],
+        }
+
+    def _update_gl_nodes(self, store, visible, on_route):
+        # WebGL nodes carry numeric status codes and static name hovers only
+        nodes = self.figure.data[NODE_TRACE]
+        if not self._hover or self._hover[0] == "":
+            self._hover = [self.names[i] for i in visible.tolist()]
+            nodes.hovertext = self._hover
+        status = store.status[visible]
+        sizes = np.where(on_route, marker_sizes(store)[visible] / 3, 5)
+        changed = (status != self._colors) | (sizes != self._sizes)
+        idx = np.flatnonzero(changed)
+        if len(idx) == 0:
+            return {}
+        self._colors, self._sizes = status, sizes
+        with self.figure.batch_update():
+            nodes.marker.color = status
+            nodes.marker.size = sizes
+        return {
+            "idx": visible[idx].tolist(),
+            "marker.color": status[idx].tolist(),
+            "marker.size": sizes[idx].round(2).tolist(),
+        }
+
+    def _update_zones(self, store):
+        summary = zone_summary(store, self.x, self.y)
+        sizes = np.clip(20 + np.sqrt(summary["vehicles"]) / 2, 20, 90)
+        hover = [f"<b>{zone}</b><br>Signals: {n}<br>Green: {g}<br>Vehicles: {v}<br>Congestion: {int(c*100)}%"
+                 for zone, n, g, v, c in zip(store.zone_names, summary["signals"], summary["green"],
+                                             summary["vehicles"], summary["congestion"])]
+        zones = self.figure.data[ZONE_TRACE]
+        with self.figure.batch_update():
+            zones.x, zones.y = summary["x"], summary["y"]
+            zones.marker.size = sizes
+            zones.marker.color = summary["congestion"]
+            zones.text = store.zone_names
+            zones.hovertext = hover
+        return {ZONE_TRACE: {"marker.size": sizes.round(2).tolist(),
+                             "marker.color": summary["congestion"].round(3).tolist(),
+                             "hovertext": hover}}
+
+    def _update_route(self, emergency, progress):
+        if emergency is None:
+            state = None
+        else:
+            prog_points = int(progress / 100 * len(emergency["route_idx"]))
+            state = (tuple(emergency["route_idx"].tolist()), prog_points, emergency["position"])
+        if state == self._route_state:
+            return {}
+        self._route_state = state
+
+        route = np.array(state[0] if state else [], dtype=np.intp)
+        prog_points = state[1] if state and state[1] > 1 else 0
+        trail = route[:state[2] + 1] if state and state[2] > 0 else route[:0]
+        traces = {
+            ROUTE_TRACE: route,
+            PROGRESS_TRACE: route[:prog_points],
+            TRAIL_TRACE: trail,
+        }
+        diff = {}
+        with self.figure.batch_update():
+            for trace, nodes in traces.items():
+                x, y = self.x[nodes].tolist(), self.y[nodes].tolist()
+                self.figure.data[trace].x = x
+                self.figure.data[trace].y = y
+                diff[trace] = {"x": x, "y": y}
+        return diff
+
+
+def diff_to_json(diff):
+    return json.dumps({str(trace): props for trace, props in diff.items()})
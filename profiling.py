@@ -0,0 +1,162 @@
+import cProfile
+import io
+import marshal
+import pstats
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+import numpy as np
+
+# Latency samples kept per stage
+SPAN_WINDOW = 200
+
+
+class _NoSpan:
+    """Shared do-nothing context used while timing is off"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NO_SPAN = _NoSpan()
+
+
+class _Span:
+    __slots__ = ("samples", "start")
+
+    def __init__(self, samples):
+        self.samples = samples
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.samples.append(time.perf_counter() - self.start)
+        return False
+
+
+class _NoLaps:
+    def lap(self, name):
+        pass
+
+
+_NO_LAPS = _NoLaps()
+
+
+class _Laps:
+    """Times consecutive script sections without re-indenting them"""
+
+    def __init__(self, profiler):
+        self.profiler = profiler
+        self.last = time.perf_counter()
+
+    def lap(self, name):
+        """Record the time since the previous lap under name"""
+        now = time.perf_counter()
+        self.profiler._window(self.profiler._samples, name).append(now - self.last)
+        self.last = now
+
+
+class Profiler:
+    """Rolling per-stage timings that cost one attribute check when disabled
+
+    span(name) times a block into a bounded window of samples and laps()
+    times consecutive sections of a script. mark(name) records event
+    timestamps such as reruns, for rate reporting. request_profile() arms
+    a one-shot cProfile run for the next block wrapped in profile_once().
+    """
+
+    def __init__(self, enabled=False, window=SPAN_WINDOW):
+        self.enabled = enabled
+        self.window = window
+        self._samples = {}
+        self._marks = {}
+        self._lock = threading.Lock()
+        self._profile_requested = False
+        self.last_profile = None
+
+    def span(self, name):
+        if not self.enabled:
+            return _NO_SPAN
+        return _Span(self._window(self._samples, name))
+
+    def laps(self):
+        """Lap timer for sequential sections; a no-op while disabled"""
+        return _Laps(self) if self.enabled else _NO_LAPS
+
+    def mark(self, name):
+        if self.enabled:
+            self._window(self._marks, name).append(time.monotonic())
+
+    def _window(self, windows, name):
+        values = windows.get(name)
+        if values is None:
+            with self._lock:
+                values = windows.setdefault(name, deque(maxlen=self.window))
+        return values
+
+    def rate(self, name):
+        """Events per second over the recorded window of marks"""
+        marks = list(self._marks.get(name, ()))
+        if len(marks) < 2 or marks[-1] == marks[0]:
+            return 0.0
+        return (len(marks) - 1) / (marks[-1] - marks[0])
+
+    def stats(self):
+        """{stage: {count, p50_ms, p99_ms, mean_ms, last_ms}} for every stage seen"""
+        with self._lock:
+            samples = {name: list(values) for name, values in self._samples.items()}
+        stats = {}
+        for name, values in samples.items():
+            if not values:
+                continue
+            ms = np.asarray(values) * 1000
+            stats[name] = {
+                "count": len(ms),
+                "p50_ms": float(np.percentile(ms, 50)),
+                "p99_ms": float(np.percentile(ms, 99)),
+                "mean_ms": float(ms.mean()),
+                "last_ms": float(ms[-1]),
+            }
+        return stats
+
+    def reset(self):
+        with self._lock:
+            self._samples.clear()
+            self._marks.clear()
+
+    def request_profile(self):
+        self._profile_requested = True
+
+    @contextmanager
+    def profile_once(self, sort="cumulative", limit=40):
+        """Run the block under cProfile if a profile was requested
+
+        The result is kept as last_profile: the pstats text report and
+        the raw marshalled stats, which load with pstats or snakeviz.
+        """
+        if not self._profile_requested:
+            yield
+            return
+        self._profile_requested = False
+        profile = cProfile.Profile()
+        profile.enable()
+        try:
+            yield
+        finally:
+            profile.disable()
+            report = io.StringIO()
+            pstats.Stats(profile, stream=report).sort_stats(sort).print_stats(limit)
+            profile.create_stats()
+            self.last_profile = {"text": report.getvalue(), "raw": marshal.dumps(profile.stats),
+                                 "time": time.time()}
+
+
+# One profiler per process, shared by the simulation thread and every session
+PROFILER = Profiler()
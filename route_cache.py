@@ -0,0 +1,101 @@
+from collections import OrderedDict
+
+import numpy as np
+
+# Relative edge-cost change that makes a cached path stale
+DEFAULT_THRESHOLD = 0.15
+
+
+class RouteCache:
+    """LRU cache of shortest paths keyed by (origin, destination)
+
+    Each cached path records the edges it uses. refresh() compares the
+    graph's current edge costs with the costs last seen and evicts only
+    the paths that run over an edge whose cost moved beyond the threshold.
+    Cost drops on edges off a cached path are not detected; those paths
+    are picked up again when they fall out of the LRU or an edge on them
+    changes.
+    """
+
+    def __init__(self, graph, capacity=256, threshold=DEFAULT_THRESHOLD):
+        self.graph = graph
+        self.capacity = capacity
+        self.threshold = threshold
+        self._entries = OrderedDict()
+        self._edges = {}
+        self._by_edge = {}
+        self._reference = graph.weight.copy()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def get(self, origin, destination):
+        """Cached (path, seconds), computing and storing it on a miss"""
+        key = (origin, destination)
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+        self.misses += 1
+        path, seconds = self.graph.shortest_path(origin, destination)
+        entry = (path, seconds)
+        self._store(key, entry, self.graph.path_edges(path))
+        return entry
+
+    def refresh(self):
+        """Evict paths whose edges changed cost beyond the threshold
+
+        Returns the number of cached paths invalidated.
+        """
+        weight = self.graph.weight
+        change = np.abs(weight - self._reference) / np.maximum(self._reference, 1e-9)
+        changed = np.flatnonzero(change > self.threshold)
+        if len(changed) == 0:
+            return 0
+        # Changed edges become the new reference so small drifts still accumulate
+        self._reference[changed] = weight[changed]
+        stale = set()
+        for edge in changed.tolist():
+            stale.update(self._by_edge.get(edge, ()))
+        for key in stale:
+            self._evict(key)
+        self.invalidations += len(stale)
+        return len(stale)
+
+    def clear(self):
+        self._entries.clear()
+        self._edges.clear()
+        self._by_edge.clear()
+        self._reference = self.graph.weight.copy()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self), "hits": self.hits, "misses": self.misses,
+            "invalidations": self.invalidations,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+    def _store(self, key, entry, edges):
+        self._entries[key] = entry
+        self._edges[key] = edges
+        for edge in edges:
+            self._by_edge.setdefault(edge, set()).add(key)
+        if len(self._entries) > self.capacity:
+            self._evict(next(iter(self._entries)))
+
+    def _evict(self, key):
+        del self._entries[key]
+        for edge in self._edges.pop(key):
+            keys = self._by_edge.get(edge)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._by_edge[edge]
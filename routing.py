@@ -0,0 +1,292 @@
+import heapq
+import math
+
+import numpy as np
+
+try:
+    from scipy.sparse import csr_matrix
+    from scipy.sparse.csgraph import dijkstra as csgraph_dijkstra
+except ImportError:  # pure-Python search only
+    csr_matrix = csgraph_dijkstra = None
+
+EARTH_RADIUS_M = 6371000.0
+
+# Free-flow speed and per-vehicle queueing delay used for edge costs
+FREE_FLOW_MPS = 40 / 3.6
+SECONDS_PER_VEHICLE = 0.5
+
+# Graph size above which SciPy's compiled Dijkstra is used when available
+SCIPY_MIN_NODES = 5000
+
+
+def haversine_m(lat1, lon1, lat2, lon2):
+    """Great-circle distance in metres, vectorized over array arguments"""
+    lat1, lon1, lat2, lon2 = map(np.radians, (lat1, lon1, lat2, lon2))
+    a = (np.sin((lat2 - lat1) / 2) ** 2
+         + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2)
+    return 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(a))
+
+
+def leg_cost(length_m, vehicles=None, congestion_level=None):
+    """Seconds to drive road segments into intersections under the given load"""
+    seconds = np.asarray(length_m, dtype=np.float64) / FREE_FLOW_MPS
+    if congestion_level is not None:
+        seconds = seconds * (1 + np.asarray(congestion_level, dtype=np.float64))
+    if vehicles is not None:
+        seconds = seconds + np.asarray(vehicles, dtype=np.float64) * SECONDS_PER_VEHICLE
+    return seconds
+
+
+def snap_to_polyline(lat, lon, line_lat, line_lon):
+    """Closest point on a polyline to (lat, lon) in a local flat projection
+
+    Returns (segment, fraction along it, metres from the line, metres
+    along the line to the snapped point).
+    """
+    line_lat = np.asarray(line_lat, dtype=np.float64)
+    line_lon = np.asarray(line_lon, dtype=np.float64)
+    kx = EARTH_RADIUS_M * math.cos(math.radians(lat)) * math.pi / 180
+    ky = EARTH_RADIUS_M * math.pi / 180
+    x = (line_lon - lon) * kx
+    y = (line_lat - lat) * ky
+    if len(x) < 2:
+        return 0, 0.0, float(np.hypot(x[0], y[0])), 0.0
+    dx, dy = np.diff(x), np.diff(y)
+    seg_len2 = dx ** 2 + dy ** 2
+    # Projection of the origin (the query point) onto each segment
+    t = np.clip(-(x[:-1] * dx + y[:-1] * dy) / np.maximum(seg_len2, 1e-12), 0.0, 1.0)
+    offset = np.hypot(x[:-1] + t * dx, y[:-1] + t * dy)
+    seg = int(np.argmin(offset))
+    seg_len = np.sqrt(seg_len2)
+    along = float(seg_len[:seg].sum() + t[seg] * seg_len[seg])
+    return seg, float(t[seg]), float(offset[seg]), along
+
+
+def nearest_neighbour_edges(lat, lon, k=2):
+    """Connect every node to its k nearest neighbours (dense, small networks only)"""
+    dist = haversine_m(lat[:, None], lon[:, None], lat[None, :], lon[None, :])
+    np.fill_diagonal(dist, np.inf)
+    k = min(k, len(lat) - 1)
+    nearest = np.argpartition(dist, k, axis=1)[:, :k] if k > 0 else np.empty((len(lat), 0), np.intp)
+    src = np.repeat(np.arange(len(lat)), k)
+    return src, nearest.ravel()
+
+
+class RoadGraph:
+    """Directed road graph in CSR form with congestion-aware edge costs"""
+
+    def __init__(self, lat, lon, src, dst, undirected=True):
+        self.lat = np.asarray(lat, dtype=np.float64)
+        self.lon = np.asarray(lon, dtype=np.float64)
+        src = np.asarray(src, dtype=np.intp)
+        dst = np.asarray(dst, dtype=np.intp)
+        if undirected:
+            src, dst = np.concatenate([src, dst]), np.concatenate([dst, src])
+
+        # Drop self loops and duplicate edges, then sort by source; one int64
+        # key per edge sorts far faster than unique rows
+        keep = src != dst
+        n = len(self.lat)
+        keys = np.sort(src[keep].astype(np.int64) * n + dst[keep])
+        first = np.ones(len(keys), dtype=bool)
+        first[1:] = keys[1:] != keys[:-1]
+        keys = keys[first]
+        self._keys = keys
+        self.src, self.indices = (a.astype(np.intp) for a in np.divmod(keys, n))
+        self.indptr = np.zeros(n + 1, dtype=np.intp)
+        np.cumsum(np.bincount(self.src, minlength=n), out=self.indptr[1:])
+        self.length_m = haversine_m(self.lat[self.src], self.lon[self.src],
+                                    self.lat[self.indices], self.lon[self.indices])
+        lat_rad = np.radians(self.lat)
+        self._lat_rad = lat_rad.tolist()
+        self._lon_rad = np.radians(self.lon).tolist()
+        self._cos_lat = np.cos(lat_rad).tolist()
+        self._spatial_index = None
+        # Python lists are much faster than array indexing inside the search loop
+        self._indptr = self.indptr.tolist()
+        self._indices = self.indices.tolist()
+        self.update_weights()
+
+    @classmethod
+    def from_store(cls, store, routes=None, k=2):
+        """Road graph over an IntersectionStore: known route legs plus nearest neighbours"""
+        src, dst = nearest_neighbour_edges(store.lat, store.lon, k)
+        legs = [(store.index[a], store.index[b])
+                for info in (routes or {}).values()
+                for a, b in zip(info["route"], info["route"][1:])]
+        if legs:
+            legs = np.array(legs, dtype=np.intp)
+            src, dst = np.concatenate([src, legs[:, 0]]), np.concatenate([dst, legs[:, 1]])
+        graph = cls(store.lat, store.lon, src, dst)
+        graph.update_weights(store.vehicles, store.congestion_level)
+        return graph
+
+    def __len__(self):
+        return len(self.lat)
+
+    @property
+    def num_edges(self):
+        return len(self.indices)
+
+    def travel_seconds(self, vehicles=None, congestion_level=None, edges=None):
+        """Edge travel times (seconds) under a per-intersection load, for all or some edges"""
+        edges = slice(None) if edges is None else edges
+        head = self.indices[edges]
+        return leg_cost(
+            self.length_m[edges],
+            None if vehicles is None else np.asarray(vehicles)[head],
+            None if congestion_level is None else np.asarray(congestion_level)[head])
+
+    def update_weights(self, vehicles=None, congestion_level=None):
+        """Recompute edge travel times (seconds) from per-intersection load"""
+        weight = self.travel_seconds(vehicles, congestion_level)
+        self.weight = weight
+        # Cheapest seconds per metre anywhere in the graph keeps the A* bound admissible
+        moving = self.length_m > 0
+        self._seconds_per_m = float((weight[moving] / self.length_m[moving]).min()) if moving.any() else 0.0
+        self._csr = None
+        self._weight = weight.tolist()
+
+    @property
+    def spatial_index(self):
+        """Grid index over the nodes, built on first use"""
+        if self._spatial_index is None:
+            from spatial import GridIndex
+            self._spatial_index = GridIndex(self.lat, self.lon)
+        return self._spatial_index
+
+    def nearest_node(self, lat, lon):
+        """Index of the node closest to a point"""
+        ids, _ = self.spatial_index.nearest(lat, lon)
+        return int(ids[0])
+
+    def edge_id(self, u, v):
+        """Index of edge u -> v, or -1 when there is none"""
+        lo, hi = self.indptr[u], self.indptr[u + 1]
+        pos = lo + np.searchsorted(self.indices[lo:hi], v)
+        return int(pos) if pos < hi and self.indices[pos] == v else -1
+
+    def edge_ids(self, src, dst):
+        """Indices of edges src[i] -> dst[i] in one pass, -1 where there is none"""
+        keys = np.asarray(src, dtype=np.int64) * len(self) + np.asarray(dst, dtype=np.int64)
+        pos = np.minimum(np.searchsorted(self._keys, keys), max(len(self._keys) - 1, 0))
+        found = len(self._keys) > 0 and self._keys[pos] == keys
+        return np.where(found, pos, -1)
+
+    def path_edges(self, path):
+        path = np.asarray(path, dtype=np.intp)
+        return self.edge_ids(path[:-1], path[1:]).tolist()
+
+    def shortest_path(self, origin, destination, astar=True):
+        """Fastest path between two node indices as (node list, seconds)
+
+        With astar the search is guided by straight-line distance at the
+        cheapest speed found in the graph, which never overestimates the
+        remaining cost. Large graphs use SciPy's compiled Dijkstra when it
+        is installed. Returns ([], inf) when the destination is unreachable.
+        """
+        if csgraph_dijkstra is not None and len(self) >= SCIPY_MIN_NODES:
+            return self._scipy_shortest_path(origin, destination)
+
+        if astar:
+            lat, lon, cos_lat = self._lat_rad, self._lon_rad, self._cos_lat
+            goal_lat = math.radians(self.lat[destination])
+            goal_lon = math.radians(self.lon[destination])
+            cos_goal = math.cos(goal_lat)
+            scale = 2 * EARTH_RADIUS_M * self._seconds_per_m
+
+            def h(u):
+                a = (math.sin((goal_lat - lat[u]) / 2) ** 2
+                     + cos_lat[u] * cos_goal * math.sin((goal_lon - lon[u]) / 2) ** 2)
+                return scale * math.asin(math.sqrt(a))
+        else:
+            def h(u):
+                return 0.0
+
+        indptr, indices, weight = self._indptr, self._indices, self._weight
+        best = {origin: 0.0}
+        parent = {origin: -1}
+        heap = [(h(origin), 0.0, origin)]
+        closed = set()
+        while heap:
+            _, cost, u = heapq.heappop(heap)
+            if u == destination:
+                break
+            if u in closed:
+                continue
+            closed.add(u)
+            for e in range(indptr[u], indptr[u + 1]):
+                v = indices[e]
+                new_cost = cost + weight[e]
+                if new_cost < best.get(v, float("inf")):
+                    best[v] = new_cost
+                    parent[v] = u
+                    heapq.heappush(heap, (new_cost + h(v), new_cost, v))
+        else:
+            return [], float("inf")
+
+        path = [destination]
+        while parent[path[-1]] != -1:
+            path.append(parent[path[-1]])
+        return path[::-1], best[destination]
+
+    def travel_matrix(self, origins, targets, weight=None):
+        """Fastest seconds from every origin to every target, shape (origins, targets)
+
+        One multi-source search runs from whichever side is smaller, the
+        targets' side on the reversed graph, so a few ambulances against
+        many hospitals (or the reverse) costs a few searches. weight
+        overrides the current edge costs. Unreachable pairs are inf.
+        """
+        origins = np.atleast_1d(np.asarray(origins, dtype=np.intp))
+        targets = np.atleast_1d(np.asarray(targets, dtype=np.intp))
+        weight = self.weight if weight is None else np.asarray(weight, dtype=np.float64)
+        if len(origins) == 0 or len(targets) == 0:
+            return np.full((len(origins), len(targets)), np.inf)
+        if csgraph_dijkstra is not None:
+            csr = csr_matrix((weight, self.indices, self.indptr), shape=(len(self), len(self)))
+            if len(targets) < len(origins):
+                return csgraph_dijkstra(csr.T.tocsr(), indices=targets)[:, origins].T
+            return csgraph_dijkstra(csr, indices=origins)[:, targets]
+
+        if len(targets) < len(origins):
+            # Reversed graph: edges grouped by destination
+            order = np.argsort(self.indices, kind="stable")
+            indptr = np.zeros(len(self) + 1, dtype=np.intp)
+            np.cumsum(np.bincount(self.indices, minlength=len(self)), out=indptr[1:])
+            return self._search_each(indptr.tolist(), self.src[order].tolist(), weight[order].tolist(),
+                                     targets, origins).T
+        return self._search_each(self._indptr, self._indices, weight.tolist(), origins, targets)
+
+    @staticmethod
+    def _search_each(indptr, indices, costs, sources, targets):
+        """Dijkstra from each source over CSR lists, stopping once every target is settled"""
+        out = np.full((len(sources), len(targets)), np.inf)
+        wanted = set(targets.tolist())
+        for row, source in enumerate(sources.tolist()):
+            best = {source: 0.0}
+            heap = [(0.0, source)]
+            closed = set()
+            while heap and not wanted <= closed:
+                cost, u = heapq.heappop(heap)
+                if u in closed:
+                    continue
+                closed.add(u)
+                for e in range(indptr[u], indptr[u + 1]):
+                    v = indices[e]
+                    if cost + costs[e] < best.get(v, float("inf")):
+                        best[v] = cost + costs[e]
+                        heapq.heappush(heap, (best[v], v))
+            out[row] = [best.get(t, np.inf) for t in targets.tolist()]
+        return out
+
+    def _scipy_shortest_path(self, origin, destination):
+        if self._csr is None:
+            self._csr = csr_matrix((self.weight, self.indices, self.indptr), shape=(len(self), len(self)))
+        dist, pred = csgraph_dijkstra(self._csr, indices=origin, return_predecessors=True)
+        if not np.isfinite(dist[destination]):
+            return [], float("inf")
+        path = [destination]
+        while path[-1] != origin:
+            path.append(int(pred[path[-1]]))
+        return path[::-1], float(dist[destination])
@@ -0,0 +1,53 @@
+import heapq
+import itertools
+
+# Event kinds
+ARRIVE = "arrive"   # ambulance reaches the next intersection on its route
+PHASE = "phase"     # traffic advances and corridor signal phases are re-applied
+END = "end"         # emergency time runs out
+
+
+class Event:
+    """A scheduled simulation event on the virtual clock"""
+
+    __slots__ = ("time", "seq", "kind", "emergency_id", "data")
+
+    def __init__(self, time, seq, kind, emergency_id=None, data=None):
+        self.time = time
+        self.seq = seq
+        self.kind = kind
+        self.emergency_id = emergency_id
+        self.data = data
+
+    def __lt__(self, other):
+        return (self.time, self.seq) < (other.time, other.seq)
+
+    def __repr__(self):
+        return f"Event({self.time:.2f}, {self.kind}, {self.emergency_id}, {self.data})"
+
+
+class EventQueue:
+    """Priority queue of events ordered by time, ties broken by insertion order"""
+
+    def __init__(self):
+        self._heap = []
+        self._seq = itertools.count()
+
+    def __len__(self):
+        return len(self._heap)
+
+    def schedule(self, time, kind, emergency_id=None, data=None):
+        event = Event(time, next(self._seq), kind, emergency_id, data)
+        heapq.heappush(self._heap, event)
+        return event
+
+    def peek_time(self):
+        return self._heap[0].time if self._heap else float("inf")
+
+    def pop(self):
+        return heapq.heappop(self._heap)
+
+    def pop_until(self, time):
+        """Yield events due at or before time, in order"""
+        while self._heap and self._heap[0].time <= time:
+            yield heapq.heappop(self._heap)
@@ -0,0 +1,174 @@
+import threading
+import time
+
+import numpy as np
+
+from engine import Simulation
+from live_updates import ChangeFeed, diff_snapshots
+from history import IntersectionHistory, TrafficHistory, history_nodes
+from analytics import TrafficAnalytics
+from forecast import TrafficForecast
+from profiling import PROFILER
+
+# Wall-clock seconds between background simulation ticks
+TICK_SECONDS = 0.5
+# How long network-wide traffic history is retained
+HISTORY_SECONDS = 6 * 3600
+# Ticks covered by the rolling chart aggregates
+ANALYTICS_WINDOW = 50
+
+
+class SimulationService:
+    """One background thread that owns the simulation and publishes snapshots
+
+    Dashboard sessions never touch the simulation directly. They read the
+    latest immutable snapshot, and operator commands are serialized through
+    a single lock so concurrent sessions cannot interleave writes.
+    """
+
+    def __init__(self, simulation=None, tick_seconds=TICK_SECONDS, speed=1.0,
+                 history_seconds=HISTORY_SECONDS, analytics_window=ANALYTICS_WINDOW,
+                 event_log=None, gps=None, fleet=None):
+        self.simulation = simulation or Simulation()
+        self.tick_seconds = tick_seconds
+        self.speed = speed
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._version = 0
+        self._snapshot = self.simulation.snapshot(self._version)
+        self.changes = ChangeFeed()
+        self.history = TrafficHistory.for_retention(history_seconds, tick_seconds)
+        # Large networks keep rollups for hospitals, known routes and a sample of the rest
+        store = self.simulation.store
+        anchors = [self.simulation.hospital_nodes] + [store.indices(info["route"]) for info in self.simulation.routes.values()]
+        self.intersection_history = IntersectionHistory(
+            len(store), nodes=history_nodes(len(store), np.concatenate(anchors)))
+        self.analytics = TrafficAnalytics(analytics_window)
+        self.forecast = TrafficForecast()
+        # Optional EventLog that persists every published change to disk
+        self.event_log = event_log
+        # Optional PingQueue of ambulance GPS fixes, drained once per tick
+        self.gps = gps
+        # Optional DispatchCenter that re-plans its fleet every tick
+        self.fleet = fleet
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="simulation", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def snapshot(self):
+        """Latest published state; never blocks on the simulation"""
+        return self._snapshot
+
+    def activate(self, route_key):
+        return self._command(self.simulation.activate, route_key)
+
+    def dispatch(self, origin, destination, priority="High"):
+        return self._command(self.simulation.dispatch, origin, destination, priority)
+
+    def end(self, emergency_id=None):
+        return self._command(self.simulation.end, emergency_id)
+
+    def report_incident(self, place, priority="High"):
+        return self._command(self.fleet.report, place, priority)
+
+    def fleet_status(self):
+        """Per-unit dispatch rows and the number of incidents still waiting"""
+        with self._lock:
+            return self.fleet.status(), len(self.fleet.dispatcher)
+
+    def plan_route(self, origin, destination):
+        with self._lock:
+            return self.simulation.plan_route(origin, destination)
+
+    def _command(self, method, *args):
+        with self._lock:
+            result = method(*args)
+            # Fire events due at the current instant so the new state is visible
+            self.simulation.step(0)
+            self._publish()
+        return result
+
+    def tracked_intersections(self):
+        """Intersections that keep rolled-up history, sorted"""
+        return self.intersection_history.nodes
+
+    def intersection_series(self, window_seconds, node=None):
+        """Rolled-up per-intersection history covering the last window_seconds, None for untracked nodes"""
+        with self._lock:
+            return self.intersection_history.series(window_seconds, node)
+
+    def analytics_summary(self, since):
+        """Rolling chart aggregates and emergency intervals since a wall-clock time"""
+        with self._lock:
+            latest = self.history.latest()
+            now = latest["time"] if latest is not None else since
+            return self.analytics.summary(since, now)
+
+    def route_eta(self, routes):
+        """Live seconds to drive each route, given as lists of intersection names"""
+        with self._lock:
+            store = self.simulation.store
+            return self.simulation.eta.route_seconds([store.indices(route) for route in routes])
+
+    def hospital_etas(self):
+        """(emergency ids, hospital names, seconds matrix) from every active ambulance to every hospital"""
+        with self._lock:
+            simulation = self.simulation
+            return simulation.batch.ids.copy(), simulation.hospital_names, simulation.hospital_etas()
+
+    def predictions(self, routes=()):
+        """Congestion forecast and ETAs of routes (node index arrays), or None before the first tick"""
+        with self._lock:
+            return self.forecast.predict(self.simulation.graph, routes)
+
+    def changes_since(self, version):
+        """Merged change set after version, or None when a full refresh is needed"""
+        return self.changes.since(version)
+
+    def _publish(self):
+        self._version += 1
+        previous, self._snapshot = self._snapshot, self.simulation.snapshot(self._version)
+        self.changes.record(diff_snapshots(previous, self._snapshot))
+        now = time.time()
+        self._record_history(now, self._snapshot)
+        if self.event_log is not None:
+            self.event_log.record(now, previous, self._snapshot)
+
+    def _record_history(self, now, snapshot):
+        total_vehicles, green_lights, avg_congestion = snapshot.store.metrics()
+        emergency = snapshot.current()
+        emergency_id = emergency["id"] if emergency is not None else -1
+        self.history.append(
+            now, total_vehicles, green_lights, avg_congestion,
+            snapshot.emergency_active, emergency_id)
+        self.analytics.update(now, total_vehicles, green_lights, avg_congestion, emergency_id)
+        self.intersection_history.record(now, snapshot.store.vehicles, snapshot.store.status)
+        # Forecasts run on the simulation clock, so horizons mean simulated minutes
+        self.forecast.update(snapshot.clock, snapshot.store.vehicles, snapshot.store.congestion_level)
+
+    def _run(self):
+        last = time.monotonic()
+        while not self._stop.wait(self.tick_seconds):
+            now = time.monotonic()
+            with self._lock:
+                if self.gps is not None:
+                    with PROFILER.span("gps"):
+                        self.simulation.apply_gps(self.gps.drain())
+                with PROFILER.span("simulation"):
+                    self.simulation.step((now - last) * self.speed)
+                if self.fleet is not None:
+                    with PROFILER.span("dispatch"):
+                        self.fleet.tick()
+                with PROFILER.span("publish"):
+                    self._publish()
+            last = now
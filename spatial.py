@@ -0,0 +1,158 @@
+import math
+
+import numpy as np
+
+from routing import EARTH_RADIUS_M, haversine_m
+
+# Average points per grid cell the index is sized for
+POINTS_PER_CELL = 8
+# Pending inserts, as a share of indexed points, that trigger a rebuild
+REBUILD_FRACTION = 0.25
+# Local flat projection error allowance across a city-sized extent
+PROJECTION_SLACK = 0.99
+
+
+class GridIndex:
+    """Uniform grid bucket index over lat/lon points
+
+    Points are projected to local metres and bucketed into square cells
+    stored in CSR form: one sorted run of point ids per occupied cell.
+    k-nearest queries search outward ring by ring and stop once the ring
+    distance exceeds the k-th best candidate; radius queries read only the
+    cells overlapping the circle. Candidates are ranked by haversine
+    distance, so results are exact. insert() adds points to per-cell
+    overflow lists and the CSR arrays are rebuilt once those grow large.
+    """
+
+    def __init__(self, lat, lon, cell_m=None):
+        lat = np.asarray(lat, dtype=np.float64)
+        lon = np.asarray(lon, dtype=np.float64)
+        self._lat0 = math.radians(float(lat.mean())) if len(lat) else 0.0
+        self._kx = EARTH_RADIUS_M * math.cos(self._lat0) * math.pi / 180
+        self._ky = EARTH_RADIUS_M * math.pi / 180
+        if cell_m is None:
+            cell_m = self._cell_size(lat, lon)
+        self.cell_m = float(cell_m)
+        self.lat = lat.copy()
+        self.lon = lon.copy()
+        self._build()
+
+    def _cell_size(self, lat, lon):
+        if len(lat) < 2:
+            return 500.0
+        width = (lon.max() - lon.min()) * self._kx
+        height = (lat.max() - lat.min()) * self._ky
+        area = max(width, 1.0) * max(height, 1.0)
+        return max(10.0, math.sqrt(area * POINTS_PER_CELL / len(lat)))
+
+    def __len__(self):
+        return len(self.lat)
+
+    def _cells(self, lat, lon):
+        cx = np.floor(np.asarray(lon) * self._kx / self.cell_m).astype(np.int64)
+        cy = np.floor(np.asarray(lat) * self._ky / self.cell_m).astype(np.int64)
+        return cx, cy
+
+    def _build(self):
+        cx, cy = self._cells(self.lat, self.lon)
+        keys = cx * (1 << 32) + cy
+        order = np.argsort(keys, kind="stable")
+        sorted_keys = keys[order]
+        starts = np.flatnonzero(np.concatenate([[len(keys) > 0], sorted_keys[1:] != sorted_keys[:-1]]))
+        ends = np.append(starts[1:], len(order))
+        self._order = order
+        self._buckets = dict(zip(sorted_keys[starts].tolist(), zip(starts.tolist(), ends.tolist())))
+        self._overflow = {}
+        self._pending = 0
+        self._bounds = (cx.min(), cy.min(), cx.max(), cy.max()) if len(keys) else (0, 0, 0, 0)
+
+    def insert(self, lat, lon):
+        """Add points; returns their ids"""
+        lat = np.atleast_1d(np.asarray(lat, dtype=np.float64))
+        lon = np.atleast_1d(np.asarray(lon, dtype=np.float64))
+        first = len(self.lat)
+        self.lat = np.concatenate([self.lat, lat])
+        self.lon = np.concatenate([self.lon, lon])
+        ids = np.arange(first, len(self.lat))
+        self._pending += len(ids)
+        if self._pending > REBUILD_FRACTION * len(self.lat):
+            self._build()
+        else:
+            cx, cy = self._cells(lat, lon)
+            lo_x, lo_y, hi_x, hi_y = self._bounds
+            self._bounds = (min(lo_x, cx.min()), min(lo_y, cy.min()), max(hi_x, cx.max()), max(hi_y, cy.max()))
+            for key, i in zip((cx * (1 << 32) + cy).tolist(), ids.tolist()):
+                self._overflow.setdefault(key, []).append(i)
+        return ids
+
+    def _cell_points(self, cx, cy):
+        key = cx * (1 << 32) + cy
+        span = self._buckets.get(key)
+        points = self._order[span[0]:span[1]] if span is not None else None
+        extra = self._overflow.get(key)
+        if extra:
+            return np.concatenate([points, extra]) if points is not None else np.array(extra)
+        return points
+
+    def _ring(self, cx, cy, r):
+        """Point ids in the square ring of cells at Chebyshev distance r"""
+        if r == 0:
+            cells = [(cx, cy)]
+        else:
+            cells = [(cx + dx, cy + dy) for dx in range(-r, r + 1) for dy in (-r, r)]
+            cells += [(cx + dx, cy + dy) for dx in (-r, r) for dy in range(-r + 1, r)]
+        found = [p for p in (self._cell_points(x, y) for x, y in cells) if p is not None]
+        return np.concatenate(found) if found else None
+
+    def nearest(self, lat, lon, k=1):
+        """Ids and metres of the k points closest to (lat, lon), closest first"""
+        k = min(k, len(self.lat))
+        if k == 0:
+            return np.empty(0, dtype=np.intp), np.empty(0)
+        cx, cy = (int(c) for c in self._cells(lat, lon))
+        ids = np.empty(0, dtype=np.intp)
+        dist = np.empty(0)
+        max_ring = self._max_ring(cx, cy)
+        # Far from the points rings are mostly empty, and past this many
+        # cells a full vectorized scan is cheaper
+        budget = len(self._buckets) + len(self._overflow)
+        r = 0
+        while r <= max_ring:
+            if (2 * r + 1) ** 2 > budget:
+                return self._scan(lat, lon, k)
+            found = self._ring(cx, cy, r)
+            if found is not None:
+                ids = np.concatenate([ids, found])
+                dist = np.concatenate([dist, haversine_m(self.lat[found], self.lon[found], lat, lon)])
+            # Every point outside rings 0..r is at least r cells away, less a
+            # little slack for the flat projection
+            if len(ids) >= k and np.partition(dist, k - 1)[k - 1] <= r * self.cell_m * PROJECTION_SLACK:
+                break
+            r += 1
+        best = np.argsort(dist)[:k]
+        return ids[best], dist[best]
+
+    def _scan(self, lat, lon, k):
+        dist = haversine_m(self.lat, self.lon, lat, lon)
+        best = np.argpartition(dist, k - 1)[:k] if k < len(dist) else np.arange(len(dist))
+        best = best[np.argsort(dist[best])]
+        return best, dist[best]
+
+    def _max_ring(self, cx, cy):
+        """Ring count that covers every indexed point from cell (cx, cy)"""
+        lo_x, lo_y, hi_x, hi_y = self._bounds
+        return int(max(abs(cx - lo_x), abs(cx - hi_x), abs(cy - lo_y), abs(cy - hi_y)))
+
+    def within(self, lat, lon, radius_m):
+        """Ids and metres of every point within radius_m of (lat, lon), closest first"""
+        reach = int(math.ceil(radius_m / (self.cell_m * PROJECTION_SLACK)))
+        cx, cy = (int(c) for c in self._cells(lat, lon))
+        found = [p for x in range(cx - reach, cx + reach + 1) for y in range(cy - reach, cy + reach + 1)
+                 if (p := self._cell_points(x, y)) is not None]
+        if not found:
+            return np.empty(0, dtype=np.intp), np.empty(0)
+        ids = np.concatenate(found)
+        dist = haversine_m(self.lat[ids], self.lon[ids], lat, lon)
+        keep = dist <= radius_m
+        order = np.argsort(dist[keep])
+        return ids[keep][order], dist[keep][order]
@@ -0,0 +1,93 @@
+import numpy as np
+import pytest
+
+import dispatch
+from dispatch import EN_ROUTE, IDLE, TRANSPORT, DispatchCenter, Dispatcher, solve_assignment
+from engine import Simulation
+from routing import RoadGraph
+
+scipy_optimize = pytest.importorskip("scipy.optimize")
+
+
+def line_graph(n=5):
+    """n intersections about 1 km apart along a north-south road"""
+    lat = 28.6 + 0.009 * np.arange(n)
+    lon = np.full(n, 77.2)
+    return RoadGraph(lat, lon, np.arange(n - 1), np.arange(1, n))
+
+
+@pytest.fixture
+def greedy(monkeypatch):
+    monkeypatch.setattr(dispatch, "linear_sum_assignment", None)
+
+
+@pytest.mark.parametrize("shape", [(1, 1), (3, 3), (4, 6), (6, 4), (8, 8)])
+def test_greedy_solver_is_a_valid_matching_close_to_optimal(greedy, shape):
+    rng = np.random.default_rng(sum(shape))
+    for _ in range(20):
+        cost = rng.uniform(0, 100, shape)
+        rows, cols = solve_assignment(cost)
+        assert len(rows) == min(shape)
+        assert len(set(rows.tolist())) == len(rows) and len(set(cols.tolist())) == len(cols)
+        best_rows, best_cols = scipy_optimize.linear_sum_assignment(cost)
+        optimal = cost[best_rows, best_cols].sum()
+        assert cost[rows, cols].sum() >= optimal - 1e-9
+        assert cost[rows, cols].sum() <= 2.5 * optimal
+
+
+@pytest.mark.parametrize("solver", ["hungarian", "greedy"])
+def test_short_fleet_serves_the_higher_priority_incident(monkeypatch, solver):
+    if solver == "greedy":
+        monkeypatch.setattr(dispatch, "linear_sum_assignment", None)
+    dispatcher = Dispatcher(line_graph(), hospital_nodes=[2])
+    high = dispatcher.report(0, "High")
+    critical = dispatcher.report(4, "Critical")
+    plan = dispatcher.assign([2])
+    assert plan.incidents.tolist() == [critical]
+    assert high in dispatcher.ids
+
+
+def test_longer_wait_wins_between_equal_priorities():
+    dispatcher = Dispatcher(line_graph(), hospital_nodes=[2])
+    dispatcher.report(0, "High", time=600.0)
+    waiting = dispatcher.report(4, "High", time=0.0)
+    assert dispatcher.assign([2], now=600.0).incidents.tolist() == [waiting]
+
+
+def test_resolve_keeps_cached_rows_aligned():
+    graph = line_graph()
+    dispatcher = Dispatcher(graph, hospital_nodes=[0])
+    for node in (1, 3, 4):
+        dispatcher.report(node)
+    dispatcher.assign([0])
+    dispatcher.resolve([dispatcher.ids[1]])
+    dispatcher.report(2)
+    dispatcher.assign([0])
+    assert dispatcher.nodes.tolist() == [1, 4, 2]
+    assert len(dispatcher._to_incident) == len(dispatcher.ids)
+    for row, node in enumerate(dispatcher.nodes):
+        # Each cached row is zero exactly at its own incident
+        assert dispatcher._to_incident[row, node] == 0
+        assert dispatcher._to_hospital[row, 0] == pytest.approx(
+            graph.travel_matrix([node], [0])[0, 0], rel=1e-5)
+
+
+def test_unit_goes_idle_en_route_transport_idle():
+    simulation = Simulation()
+    fleet = DispatchCenter(simulation, units_per_hospital=1)
+    hospitals = set(simulation.hospital_nodes.tolist())
+    scene = next(i for i in range(len(simulation.store)) if i not in hospitals)
+    incident = fleet.report(simulation.store.names[scene], "Critical")
+    fleet.tick()
+    unit = int(np.flatnonzero(fleet.incident == incident)[0])
+    seen = [int(fleet.state[unit])]
+    for _ in range(2000):
+        simulation.step(5)
+        fleet.tick()
+        if int(fleet.state[unit]) != seen[-1]:
+            seen.append(int(fleet.state[unit]))
+        if seen[-1] == IDLE:
+            break
+    assert seen == [EN_ROUTE, TRANSPORT, IDLE]
+    assert len(fleet.dispatcher) == 0
+    assert fleet.node[unit] in hospitals
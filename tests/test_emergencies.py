@@ -0,0 +1,21 @@
+from emergencies import EmergencyBatch
+
+
+def test_slots_follow_the_csr_routes_through_removals():
+    batch = EmergencyBatch()
+    batch.add(10, [4, 5, 6], 0.0)
+    batch.add(11, [7], 0.0)
+    batch.add(12, [1, 2], 0.0)
+    owner, hop = batch.slots()
+    assert owner.tolist() == [0, 0, 0, 1, 2, 2]
+    assert hop.tolist() == [0, 1, 2, 0, 0, 1]
+    batch.remove([11])
+    owner, hop = batch.slots()
+    assert owner.tolist() == [0, 0, 0, 1, 1]
+    assert hop.tolist() == [0, 1, 2, 0, 1]
+    assert batch.route_nodes[owner == 1].tolist() == [1, 2]
+
+
+def test_slots_of_an_empty_batch():
+    owner, hop = EmergencyBatch().slots()
+    assert len(owner) == 0 and len(hop) == 0
@@ -0,0 +1,89 @@
+import numpy as np
+import pytest
+
+import event_log
+from engine import Simulation
+from event_log import EventLog, LogReplay
+
+
+@pytest.fixture
+def logged(tmp_path):
+    """A log of ten ticks of one emergency with a checkpoint every four seconds, and the snapshots it saw"""
+    simulation = Simulation(seed=0)
+    path = tmp_path / "events.bin"
+    log = EventLog(path, checkpoint_seconds=4)
+    snapshots = [simulation.snapshot(0)]
+    log.record(0.0, snapshots[0], snapshots[0])
+    simulation.activate(next(iter(simulation.routes)))
+    for version in range(1, 11):
+        simulation.step(3)
+        snapshots.append(simulation.snapshot(version))
+        log.record(float(version), snapshots[-2], snapshots[-1])
+    log.close()
+    replay = LogReplay(path)
+    yield replay, snapshots
+    replay.close()
+
+
+def assert_state(state, store):
+    np.testing.assert_array_equal(state["status"], store.status)
+    np.testing.assert_array_equal(state["vehicles"], store.vehicles)
+    np.testing.assert_allclose(state["congestion_level"], store.congestion_level, rtol=1e-6)
+
+
+@pytest.mark.parametrize("chunk", [event_log.REPLAY_CHUNK, 3])
+def test_state_at_matches_every_logged_snapshot(logged, monkeypatch, chunk):
+    monkeypatch.setattr(event_log, "REPLAY_CHUNK", chunk)
+    replay, snapshots = logged
+    for version, snapshot in enumerate(snapshots):
+        assert_state(replay.state_at(float(version)), snapshot.store)
+
+
+def test_state_at_between_records_is_the_earlier_state(logged):
+    replay, snapshots = logged
+    assert_state(replay.state_at(6.5), snapshots[6].store)
+    assert_state(replay.state_at(1e9), snapshots[-1].store)
+
+
+def test_state_at_before_the_first_checkpoint_is_none(logged):
+    replay, _ = logged
+    assert replay.state_at(-1.0) is None
+
+
+def test_incidents_reads_the_activated_route(logged):
+    replay, snapshots = logged
+    incidents = replay.incidents()
+    assert len(incidents) == 1
+    emergency = next(iter(snapshots[1].emergencies.values()))
+    assert list(incidents[0]["route_idx"]) == list(emergency["route_idx"])
+
+
+def test_incidents_index_grows_with_the_log(tmp_path):
+    simulation = Simulation(seed=0)
+    path = tmp_path / "events.bin"
+    log = EventLog(path)
+    previous = simulation.snapshot(0)
+    replay = LogReplay(path)
+
+    def tick(version):
+        nonlocal previous
+        simulation.step(1)
+        current = simulation.snapshot(version)
+        log.record(float(version), previous, current)
+        previous = current
+
+    simulation.activate(next(iter(simulation.routes)))
+    tick(1)
+    assert [i["end"] for i in replay.refresh().incidents()] == [None]
+    assert replay._scanned == len(replay)
+
+    # The open incident is closed by records read after the first scan
+    simulation.end()
+    tick(2)
+    scanned = replay._scanned
+    incidents = replay.refresh().incidents()
+    assert replay._scanned == len(replay) > scanned
+    assert len(incidents) == 1 and incidents[0]["end"] == 2.0
+    assert replay.incidents() == incidents
+    log.close()
+    replay.close()
@@ -0,0 +1,122 @@
+import threading
+
+import numpy as np
+import pytest
+
+from engine import Simulation
+from gps import ARRIVAL_M, GPS_STALE_SECONDS, OFF_ROUTE_M, PingQueue, SimulatedSource, pings
+from routing import EARTH_RADIUS_M, haversine_m, snap_to_polyline
+
+
+def point_on_leg(simulation, route_idx, leg, share, side_m=0.0):
+    """A fix share of the way along a route leg, pushed side_m north of it"""
+    a, b = route_idx[leg], route_idx[leg + 1]
+    lat = simulation.store.lat[a] + share * (simulation.store.lat[b] - simulation.store.lat[a])
+    lon = simulation.store.lon[a] + share * (simulation.store.lon[b] - simulation.store.lon[a])
+    return lat + np.degrees(side_m / EARTH_RADIUS_M), lon
+
+
+@pytest.fixture
+def simulation():
+    simulation = Simulation(seed=0)
+    simulation.activate(next(iter(simulation.routes)))
+    return simulation
+
+
+def fix(simulation, eid, lat, lon):
+    return simulation.apply_gps(pings([simulation.clock], [eid], [lat], [lon]))
+
+
+def test_snap_to_polyline():
+    line_lat, line_lon = np.array([28.60, 28.61, 28.61]), np.array([77.20, 77.20, 77.21])
+    seg, t, offset, along = snap_to_polyline(28.605, 77.2002, line_lat, line_lon)
+    assert seg == 0 and t == pytest.approx(0.5, abs=1e-3)
+    assert offset == pytest.approx(haversine_m(28.605, 77.2, 28.605, 77.2002), rel=1e-3)
+    assert along == pytest.approx(haversine_m(28.60, 77.2, 28.605, 77.2), rel=1e-3)
+    seg, t, _, along = snap_to_polyline(28.62, 77.22, line_lat, line_lon)
+    assert (seg, t) == (1, 1.0)
+    assert along == pytest.approx(haversine_m(28.60, 77.2, 28.61, 77.2) + haversine_m(28.61, 77.2, 28.61, 77.21),
+                                  rel=1e-3)
+    assert snap_to_polyline(28.6, 77.2, line_lat[:1], line_lon[:1]) == (0, 0.0, 0.0, 0.0)
+
+
+def test_gps_position_is_the_last_node_passed_and_never_moves_back(simulation):
+    eid = next(iter(simulation.emergencies))
+    emergency = simulation.emergencies[eid]
+    route_idx = emergency["route_idx"]
+    fix(simulation, eid, *point_on_leg(simulation, route_idx, 1, 0.9))
+    assert emergency["position"] == 1
+    progress = emergency["gps_progress"]
+    fix(simulation, eid, *point_on_leg(simulation, route_idx, 0, 0.2))
+    assert emergency["position"] == 1
+    assert emergency["gps_progress"] == progress
+    assert simulation.batch.position[simulation.batch.slot(eid)] == 1
+
+
+def test_gps_arrival_needs_a_fix_at_the_destination(simulation):
+    eid = next(iter(simulation.emergencies))
+    route_idx = simulation.emergencies[eid]["route_idx"]
+    last = len(route_idx) - 2
+    fix(simulation, eid, *point_on_leg(simulation, route_idx, last, 0.55))
+    assert eid in simulation.emergencies and simulation.completed == 0
+    leg_m = simulation.emergencies[eid]["leg_m"][-1]
+    fix(simulation, eid, *point_on_leg(simulation, route_idx, last, 1 - 0.5 * ARRIVAL_M / leg_m))
+    assert eid not in simulation.emergencies and simulation.completed == 1
+
+
+def test_fixes_away_from_the_route_are_flagged(simulation):
+    eid = next(iter(simulation.emergencies))
+    emergency = simulation.emergencies[eid]
+    fix(simulation, eid, *point_on_leg(simulation, emergency["route_idx"], 0, 0.5, side_m=2 * OFF_ROUTE_M))
+    assert emergency["off_route"]
+    assert emergency["gps_offset_m"] > OFF_ROUTE_M
+    fix(simulation, eid, *point_on_leg(simulation, emergency["route_idx"], 0, 0.6, side_m=10))
+    assert not emergency["off_route"]
+
+
+def test_a_silent_feed_falls_back_to_scheduled_legs(simulation):
+    eid = next(iter(simulation.emergencies))
+    emergency = simulation.emergencies[eid]
+    fix(simulation, eid, *point_on_leg(simulation, emergency["route_idx"], 0, 0.1))
+    simulation.step(GPS_STALE_SECONDS + 1)
+    assert "gps_progress" not in emergency
+    simulation.step(emergency["route_seconds"] * 2)
+    assert eid not in simulation.emergencies and simulation.completed == 1
+
+
+def run_route(source=None):
+    """Simulated seconds a three-node route takes, driven by GPS fixes from source or by its schedule"""
+    simulation = Simulation(seed=0)
+    route = simulation.routes[next(iter(simulation.routes))]["route"][:3]
+    eid = simulation.activate_route(route)
+    while eid in simulation.emergencies and simulation.clock < 3600:
+        simulation.step(0.5)
+        if source is not None:
+            simulation.apply_gps(source.fixes(simulation.snapshot(), simulation.clock))
+    assert eid not in simulation.emergencies
+    return simulation.clock
+
+
+def test_simulated_fleet_arrives_when_the_schedule_would():
+    source = SimulatedSource(PingQueue(), service=None, noise_m=5.0, seed=0)
+    assert run_route(source) == pytest.approx(run_route(), rel=0.02)
+
+
+def test_ping_queue_pushes_back_on_producers():
+    queue = PingQueue(capacity=4)
+    batch = pings([0, 1, 2], [0, 0, 0], [28.6] * 3, [77.2] * 3)
+    assert queue.put(batch)
+    assert not queue.put(batch, timeout=0)
+    assert queue.stats() == {"queued": 3, "accepted": 3, "dropped": 3}
+    with pytest.raises(ValueError):
+        queue.put(pings([0] * 5, [0] * 5, [28.6] * 5, [77.2] * 5))
+
+    # A blocked producer resumes once the simulation drains the queue
+    done = threading.Event()
+    producer = threading.Thread(target=lambda: queue.put(batch) and done.set())
+    producer.start()
+    assert not done.wait(0.1)
+    assert len(queue.drain()) == 3
+    assert done.wait(5)
+    producer.join()
+    assert len(queue) == 3 and queue.stats()["accepted"] == 6
@@ -0,0 +1,77 @@
+import numpy as np
+
+from history import IntersectionHistory, TrafficHistory, history_nodes
+from network import GREEN, RED
+
+
+def filled(capacity, count):
+    history = TrafficHistory(capacity)
+    for i in range(count):
+        history.append(float(i), 10 * i, i % 7, i / 100, i % 2 == 0, i)
+    return history
+
+
+def test_window_before_the_buffer_fills():
+    history = filled(5, 3)
+    assert len(history) == 3
+    assert history.window()["time"].tolist() == [0.0, 1.0, 2.0]
+    assert history.window(2)["time"].tolist() == [1.0, 2.0]
+    assert history.window(10)["time"].tolist() == [0.0, 1.0, 2.0]
+
+
+def test_window_after_wrapping_keeps_the_newest_records_in_order():
+    history = filled(5, 13)
+    assert len(history) == 5
+    window = history.window()
+    assert window["time"].tolist() == [8.0, 9.0, 10.0, 11.0, 12.0]
+    assert window["total_vehicles"].tolist() == [80, 90, 100, 110, 120]
+    assert history.window(3)["emergency_id"].tolist() == [10, 11, 12]
+    assert history.latest()["time"] == 12.0
+
+
+def test_window_is_a_view_for_every_head_position():
+    for count in range(1, 12):
+        history = filled(4, count)
+        window = history.window()
+        assert np.shares_memory(window, history._data)
+        assert window["time"].tolist() == [float(i) for i in range(max(0, count - 4), count)]
+
+
+def test_empty_history():
+    history = TrafficHistory(3)
+    assert len(history.window()) == 0
+    assert len(history.window(2)) == 0
+    assert history.latest() is None
+    assert len(history.since(0.0)) == 0
+
+
+def test_since_is_inclusive():
+    history = filled(10, 15)
+    assert history.since(12.0)["time"].tolist() == [12.0, 13.0, 14.0]
+
+
+def test_intersection_history_rolls_up_tracked_nodes_only():
+    history = IntersectionHistory(10, levels=((10, 6), (60, 4)), nodes=[7, 2, 7])
+    assert history.nodes.tolist() == [2, 7]
+    vehicles = np.arange(10, dtype=np.int32) * 10
+    status = np.full(10, GREEN, dtype=np.int8)
+    for t in range(25):
+        status[7] = GREEN if t % 2 else RED
+        history.record(float(t), vehicles + t, status)
+    series = history.series(30, node=7)
+    assert series["resolution"] == 10
+    assert series["time"].tolist() == [0.0, 10.0, 20.0]
+    assert series["min"].tolist() == [70, 80, 90]
+    assert series["max"].tolist() == [79, 89, 94]
+    np.testing.assert_allclose(series["mean"], [74.5, 84.5, 92.0])
+    np.testing.assert_allclose(series["green"], [0.5, 0.5, 0.4])
+    assert history.series(30, node=3) is None
+    assert history.series(30)["mean"].shape == (3, 2)
+
+
+def test_history_nodes_caps_large_networks_and_keeps_anchors():
+    assert history_nodes(50, limit=100).tolist() == list(range(50))
+    nodes = history_nodes(100000, anchors=[99998, 12345], limit=1000)
+    assert len(nodes) <= 1000
+    assert {12345, 99998} <= set(nodes.tolist())
+    assert np.all(np.diff(nodes) > 0)
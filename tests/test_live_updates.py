@@ -0,0 +1,59 @@
+from http.client import HTTPConnection
+
+import numpy as np
+import pytest
+
+from live_updates import TRACKED_FIELDS, ChangeFeed, EventStreamServer
+from service import SimulationService
+
+
+@pytest.fixture(scope="module")
+def server():
+    server = EventStreamServer(SimulationService(), port=0).start()
+    yield server
+    server.stop()
+
+
+def get_status(server, path):
+    host, port = server.httpd.server_address[:2]
+    connection = HTTPConnection(host, port, timeout=5)
+    try:
+        connection.request("GET", path)
+        return connection.getresponse().status
+    finally:
+        connection.close()
+
+
+@pytest.mark.parametrize("since", ["abc", "1.5", "-"])
+def test_malformed_since_is_a_bad_request(server, since):
+    assert get_status(server, f"/events?since={since}") == 400
+
+
+def test_unknown_path_is_not_found(server):
+    assert get_status(server, "/changes") == 404
+
+
+def change(version, nodes=()):
+    return {"version": version, "clock": float(version), "nodes": np.asarray(nodes, dtype=np.intp),
+            "fields": {field: np.zeros(len(nodes)) for field in TRACKED_FIELDS},
+            "emergencies_changed": False}
+
+
+def test_feed_merges_changes_after_a_version():
+    feed = ChangeFeed(capacity=4)
+    for version, nodes in enumerate([[1], [2, 3], [1]], start=1):
+        feed.record(change(version, nodes))
+    merged = feed.since(1)
+    assert merged["version"] == 3
+    assert sorted(merged["nodes"].tolist()) == [1, 2, 3]
+    assert len(feed.since(3)["nodes"]) == 0
+
+
+def test_feed_sends_readers_that_are_too_old_or_from_a_previous_run_back_to_a_reset():
+    feed = ChangeFeed(capacity=2)
+    for version in range(1, 5):
+        feed.record(change(version))
+    assert feed.since(1) is None
+    assert feed.since(500) is None
+    # A reader from before a restart does not wait for versions that will not come
+    assert feed.wait(500, timeout=5) is None
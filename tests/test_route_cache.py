@@ -0,0 +1,50 @@
+import numpy as np
+
+from engine import ROUTE_REFRESH_SECONDS, Simulation
+from route_cache import DEFAULT_THRESHOLD, RouteCache
+from routing import RoadGraph
+
+
+def line_graph(n=6):
+    lat = 28.6 + 0.009 * np.arange(n)
+    return RoadGraph(lat, np.full(n, 77.2), np.arange(n - 1), np.arange(1, n))
+
+
+def test_refresh_evicts_only_paths_over_changed_edges():
+    graph = line_graph()
+    cache = RouteCache(graph)
+    cache.get(0, 2)
+    cache.get(3, 5)
+    weight = graph.weight.copy()
+    weight[graph.edge_ids([4], [5])] *= 1 + DEFAULT_THRESHOLD / 2
+    graph.weight = weight
+    assert cache.refresh() == 0
+    weight = weight.copy()
+    weight[graph.edge_ids([1], [2])] *= 2
+    graph.weight = weight
+    assert cache.refresh() == 1
+    assert (0, 2) not in cache and (3, 5) in cache
+    assert cache.stats()["invalidations"] == 1
+
+
+def test_route_lookups_between_refreshes_skip_edge_repricing(monkeypatch):
+    simulation = Simulation(seed=0)
+    origin, destination = simulation.store.names[0], simulation.store.names[-1]
+    route, seconds = simulation.plan_route(origin, destination)
+
+    def every_edge(*args, **kwargs):
+        raise AssertionError("re-priced every edge on a cache hit")
+
+    monkeypatch.setattr(simulation.graph, "update_weights", every_edge)
+    monkeypatch.setattr(simulation.route_cache, "refresh", every_edge)
+    simulation.step(ROUTE_REFRESH_SECONDS / 2)
+    assert simulation.plan_route(origin, destination) == (route, seconds)
+    assert simulation.route_cache.stats()["hits"] == 1
+
+    monkeypatch.undo()
+    simulation.step(ROUTE_REFRESH_SECONDS)
+    calls = []
+    refresh = simulation.route_cache.refresh
+    monkeypatch.setattr(simulation.route_cache, "refresh", lambda: calls.append(1) or refresh())
+    simulation.plan_route(origin, destination)
+    assert calls == [1]
@@ -0,0 +1,50 @@
+import numpy as np
+import pytest
+
+import routing
+from routing import RoadGraph
+
+scipy_csgraph = pytest.importorskip("scipy.sparse.csgraph")
+
+
+def one_way_grid(side=6, seed=0):
+    """A grid of intersections with some one-way streets and random costs"""
+    rng = np.random.default_rng(seed)
+    row, col = np.divmod(np.arange(side * side), side)
+    east, north = np.flatnonzero(col < side - 1), np.flatnonzero(row < side - 1)
+    src, dst = np.concatenate([east, north]), np.concatenate([east + 1, north + side])
+    # Some streets run against the grid and some are one-way
+    flip = rng.random(len(src)) < 0.3
+    src, dst = np.where(flip, dst, src), np.where(flip, src, dst)
+    twoway = rng.random(len(src)) < 0.6
+    src, dst = np.concatenate([src, dst[twoway]]), np.concatenate([dst, src[twoway]])
+    graph = RoadGraph(28.6 + 0.005 * row, 77.2 + 0.005 * col, src, dst, undirected=False)
+    return graph, rng.uniform(10, 100, len(graph.indices))
+
+
+@pytest.mark.parametrize("origins, targets", [
+    ([0, 5, 17], list(range(36))),   # forward search from the origins
+    (list(range(36)), [3, 20]),      # reverse search from the targets
+])
+def test_pure_python_travel_matrix_matches_scipy(monkeypatch, origins, targets):
+    graph, weight = one_way_grid()
+    expected = graph.travel_matrix(origins, targets, weight)
+    monkeypatch.setattr(routing, "csgraph_dijkstra", None)
+    actual = graph.travel_matrix(origins, targets, weight)
+    assert actual.shape == (len(origins), len(targets))
+    np.testing.assert_allclose(actual, expected)
+
+
+def test_single_intersection_network_without_edges():
+    from engine import Simulation
+    from generator import generate_network
+    from network import DELHI_INTERSECTIONS
+
+    store, graph, hospitals, routes = generate_network(1, seed=0)
+    assert graph.num_edges == 0 and routes == {}
+    assert graph.shortest_path(0, 0) == ([0], 0.0)
+
+    name = next(iter(DELHI_INTERSECTIONS))
+    sim = Simulation(intersections={name: DELHI_INTERSECTIONS[name]}, routes={}, seed=0)
+    sim.step(60.0)
+    assert sim.graph.num_edges == 0 and sim.clock == 60.0
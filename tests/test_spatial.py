@@ -0,0 +1,69 @@
+import numpy as np
+import pytest
+
+from routing import haversine_m
+from spatial import GridIndex
+
+
+def city(n=2000, seed=0):
+    rng = np.random.default_rng(seed)
+    return 28.5 + 0.2 * rng.random(n), 77.1 + 0.2 * rng.random(n)
+
+
+def brute_nearest(lat, lon, qlat, qlon, k):
+    dist = haversine_m(lat, lon, qlat, qlon)
+    order = np.argsort(dist)[:k]
+    return order, dist[order]
+
+
+@pytest.mark.parametrize("k", [1, 5, 40])
+def test_nearest_matches_a_full_scan(k):
+    lat, lon = city()
+    index = GridIndex(lat, lon)
+    rng = np.random.default_rng(1)
+    for qlat, qlon in zip(28.5 + 0.2 * rng.random(50), 77.1 + 0.2 * rng.random(50)):
+        ids, dist = index.nearest(qlat, qlon, k)
+        _, expected = brute_nearest(lat, lon, qlat, qlon, k)
+        np.testing.assert_allclose(dist, expected)
+        np.testing.assert_allclose(haversine_m(lat[ids], lon[ids], qlat, qlon), dist)
+
+
+def test_nearest_far_outside_the_points_falls_back_to_a_scan():
+    lat, lon = city(500)
+    index = GridIndex(lat, lon)
+    ids, dist = index.nearest(40.0, 10.0, 3)
+    expected_ids, expected = brute_nearest(lat, lon, 40.0, 10.0, 3)
+    assert ids.tolist() == expected_ids.tolist()
+    np.testing.assert_allclose(dist, expected)
+
+
+def test_within_returns_every_point_in_the_radius_closest_first():
+    lat, lon = city()
+    index = GridIndex(lat, lon)
+    ids, dist = index.within(28.6, 77.2, 1500)
+    all_dist = haversine_m(lat, lon, 28.6, 77.2)
+    assert sorted(ids.tolist()) == np.flatnonzero(all_dist <= 1500).tolist()
+    assert np.all(np.diff(dist) >= 0)
+
+
+def test_inserted_points_are_found_before_and_after_a_rebuild():
+    lat, lon = city(400)
+    index = GridIndex(lat, lon)
+    first = index.insert(28.61, 77.21)
+    assert index._overflow
+    assert index.nearest(28.61, 77.21)[0].tolist() == first.tolist()
+    rng = np.random.default_rng(2)
+    more = index.insert(28.5 + 0.2 * rng.random(200), 77.1 + 0.2 * rng.random(200))
+    assert not index._overflow
+    assert len(index) == 601
+    assert index.nearest(index.lat[more[-1]], index.lon[more[-1]])[0].tolist() == [more[-1]]
+    assert first[0] in index.within(28.61, 77.21, 1.0)[0]
+
+
+def test_empty_index():
+    index = GridIndex([], [])
+    ids, dist = index.nearest(28.6, 77.2, 3)
+    assert len(ids) == 0 and len(dist) == 0
+    assert len(index.within(28.6, 77.2, 1000)[0]) == 0
+    index.insert([28.6], [77.2])
+    assert index.nearest(28.6, 77.2)[0].tolist() == [0]
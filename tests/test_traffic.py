@@ -0,0 +1,18 @@
+import numpy as np
+
+from generator import synthetic_simulation
+from live_updates import diff_snapshots
+from traffic import CONGESTION_STEP
+
+
+def test_published_load_is_quantized_and_change_sets_stay_small():
+    simulation = synthetic_simulation(2000, seed=1)
+    simulation.step(60)
+    previous = simulation.snapshot(0)
+    for version in range(1, 11):
+        simulation.step(1.0)
+        current = simulation.snapshot(version)
+        assert len(diff_snapshots(previous, current)["nodes"]) < len(simulation.store) // 4
+        previous = current
+    steps = simulation.store.congestion_level / CONGESTION_STEP
+    np.testing.assert_allclose(steps, np.round(steps), atol=1e-3)
@@ -0,0 +1,114 @@
+import numpy as np
+
+from network import GREEN, RED, YELLOW
+
+# Share of each tick a signal lets its approaches discharge, by status
+GREEN_SHARE = np.zeros(3)
+GREEN_SHARE[[RED, YELLOW, GREEN]] = (0.3, 0.45, 0.6)
+
+# Saturation flow per lane (vehicles per second) and lanes per approach
+SATURATION_FLOW = 0.5
+LANES = 2
+# Road length per queued vehicle, and the approach length that can hold a queue
+VEHICLE_SPACING_M = 7.5
+MAX_QUEUE_M = 150.0
+# Free-flow speed along an approach, metres per second
+FREE_SPEED_MPS = 12.0
+# Share of discharged vehicles that finish their trip at each intersection
+EXIT_SHARE = 0.1
+# Trips generated per intersection per second, scaled by its base congestion
+DEMAND_PER_NODE = 0.12
+# Vehicles a queue must move by before the store is updated, and the
+# congestion resolution published, so change sets only carry real moves
+VEHICLE_DEADBAND = 1.0
+CONGESTION_STEP = 0.01
+
+
+class QueueModel:
+    """Vectorized cell-transmission model with one queue cell per road edge
+
+    Each directed edge u -> v holds the vehicles on the last stretch of
+    road before v. A tick discharges those that reach the stop line at
+    free-flow speed, up to the approach capacity times the green share
+    of v's signal, splits the discharge evenly over v's outgoing
+    edges and holds it back, FIFO, when any of them is full. A share of
+    discharged vehicles leaves the network, and each node generates new
+    trips into its outgoing edges as space allows. Everything is a
+    handful of NumPy passes over the edge arrays.
+
+    An intersection's vehicles are the queues on its approaches. Its
+    congestion is their occupancy of the approach storage.
+    """
+
+    def __init__(self, graph, vehicles, congestion_level):
+        n = len(graph)
+        self.n = n
+        self.src = graph.src
+        self.dst = graph.indices
+        self.indptr = graph.indptr
+        self.outdeg = np.diff(graph.indptr)
+        self.capacity = np.full(len(self.dst), SATURATION_FLOW * LANES)
+        approach_m = np.minimum(graph.length_m, MAX_QUEUE_M)
+        self.storage = approach_m / VEHICLE_SPACING_M * LANES
+        # Share of an approach's vehicles that reach the stop line per second
+        self.reach_rate = FREE_SPEED_MPS / np.maximum(approach_m, FREE_SPEED_MPS)
+        self.node_storage = np.bincount(self.dst, self.storage, minlength=n)
+        self.demand = DEMAND_PER_NODE * (0.5 + np.asarray(congestion_level, dtype=np.float64))
+        self.queue = np.zeros(len(self.dst))
+        self.load(vehicles)
+
+    def load(self, vehicles):
+        """Spread per-intersection vehicle counts over their approaches by storage"""
+        vehicles = np.asarray(vehicles, dtype=np.float64)
+        share = self.storage / np.maximum(self.node_storage[self.dst], 1e-9)
+        self.queue = np.minimum(vehicles[self.dst] * share, self.storage)
+
+    def node_vehicles(self):
+        return np.bincount(self.dst, self.queue, minlength=self.n)
+
+    def step(self, status, dt):
+        """Advance every queue by dt seconds under the given signal states"""
+        queue, dst, src = self.queue, self.dst, self.src
+        # Sending: vehicles that reach the stop line, up to what the signal lets through
+        reached = queue * np.minimum(self.reach_rate * dt, 1.0)
+        send = np.minimum(reached, self.capacity * GREEN_SHARE[status[dst]] * dt)
+        demand = np.bincount(dst, send, minlength=self.n)
+        onward = demand * (1 - EXIT_SHARE)
+
+        # Receiving: free space on each outgoing edge, shared evenly by node
+        free = self.storage - queue
+        has_out = self.outdeg > 0
+        per_edge = np.zeros(self.n)
+        per_edge[has_out] = onward[has_out] / self.outdeg[has_out]
+        ratio = free / np.maximum(per_edge[src], 1e-12)
+        # FIFO diverge: the fullest outgoing edge throttles the whole node
+        scale = np.ones(self.n)
+        starts = self.indptr[:-1][has_out]
+        scale[has_out] = np.minimum(np.minimum.reduceat(ratio, starts), 1.0)
+
+        moved = send * scale[dst]
+        inflow = per_edge[src] * scale[src]
+
+        # New trips fill whatever space is left
+        space = np.maximum(free - inflow, 0)
+        generated = np.zeros(self.n)
+        generated[has_out] = self.demand[has_out] * dt / self.outdeg[has_out]
+        self.queue = queue - moved + inflow + np.minimum(generated[src], space)
+
+    def write(self, store, full=False):
+        """Publish intersection vehicles and congestion into the store
+
+        Counts are whole vehicles and only change where the queues moved by
+        VEHICLE_DEADBAND from what the store holds, so a count hovering
+        around a half does not flip every tick. Congestion follows the
+        published count in CONGESTION_STEP increments. full rewrites every
+        intersection, as done once when the model takes over the store.
+        """
+        vehicles = self.node_vehicles()
+        if full:
+            moved = np.arange(self.n)
+        else:
+            moved = np.flatnonzero(np.abs(vehicles - store.vehicles) >= VEHICLE_DEADBAND)
+        store.vehicles[moved] = np.rint(vehicles[moved]).astype(np.int32)
+        occupancy = store.vehicles[moved] / np.maximum(self.node_storage[moved], 1e-9)
+        store.congestion_level[moved] = np.round(np.clip(occupancy, 0, 1) / CONGESTION_STEP) * CONGESTION_STEP